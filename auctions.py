@@ -1,14 +1,20 @@
+import bisect
 import itertools
 import logging
+import math
 from fractions import Fraction
-import networkx as nx
+import numpy as np
 from functools import reduce
 import operator
+from collections.abc import Sequence
 
 from gamebuilder import BayesianGame, PlayerSpecification
 
 logging.basicConfig(level=logging.INFO)
 
+TYPE_CELLS_PER_BLOCK = 2 ** 20
+NO_BID = np.iinfo(np.int64).min
+
 
 class FirstPriceAuction(BayesianGame):
 
@@ -16,6 +22,7 @@ class FirstPriceAuction(BayesianGame):
 
         self.all_pay = all_pay
         self.no_ties = no_ties
+        self.symmetric = None
 
         super(FirstPriceAuction, self).__init__(
             game_name=game_name,
@@ -26,27 +33,253 @@ class FirstPriceAuction(BayesianGame):
                                                  self.player_specifications]))
 
     def get_player_bids(self, player_types, strategy_profile):
-        return [player_strategy[player_specification.get_type_index(player_type)] for
+        return [player_specification.get_bid(player_type, player_strategy) for
                 player_type, player_strategy, player_specification in
                 zip(player_types, strategy_profile, self.player_specifications)]
 
+    def get_game_parameters(self):
+        game_parameters = super(FirstPriceAuction, self).get_game_parameters()
+        game_parameters.update({"all_pay": self.all_pay, "no_ties": self.no_ties})
+        return game_parameters
+
+    def get_tie_multiple(self):
+        """
+        Tie utilities are split among at most num_players winners, so scaling utilities by lcm(1, ..., num_players)
+        keeps them integer.
+        """
+        return math.lcm(*range(1, self.num_players + 1))
+
+    def get_payoff_denominator(self):
+        num_type_profiles = reduce(operator.mul, [len(player_specification.player_types) for player_specification in
+                                                  self.player_specifications])
+        return num_type_profiles * self.get_tie_multiple()
+
+    def set_player_specifications(self, player_specifications):
+        super(FirstPriceAuction, self).set_player_specifications(player_specifications)
+        self.symmetric = None
+
+    def is_symmetric(self):
+        if self.symmetric is None:
+            first_specification = self.player_specifications[0]
+            self.symmetric = all(
+                type(player_specification) is type(first_specification) and
+                list(player_specification.player_types) == list(first_specification.player_types) and
+                player_specification.get_strategy_catalogue() == first_specification.get_strategy_catalogue()
+                for player_specification in self.player_specifications[1:])
+
+        return self.symmetric
+
+    def get_bid_tables(self):
+        return [player_specification.get_bid_table() for player_specification in self.player_specifications]
+
+    def get_payoff_block(self, profile_indexes):
+        """
+        Vectorized expected utilities: for every profile in the block, bids are broadcast over the grid of type
+        profiles. Payoffs are integer numerators over get_payoff_denominator().
+        """
+        bid_tables = self.get_bid_tables()
+        type_grid_shape = [len(player_specification.player_types) for player_specification in
+                           self.player_specifications]
+        profiles_per_block = max(1, TYPE_CELLS_PER_BLOCK // reduce(operator.mul, type_grid_shape))
+
+        payoff_block = np.zeros((len(profile_indexes), self.num_players), dtype=np.int64)
+        for block_start in range(0, len(profile_indexes), profiles_per_block):
+            block_indexes = profile_indexes[block_start:block_start + profiles_per_block]
+            payoff_block[block_start:block_start + profiles_per_block] = self.get_type_grid_utilities(
+                block_indexes, bid_tables, type_grid_shape).reshape(len(block_indexes), -1,
+                                                                    self.num_players).sum(axis=1)
+
+        return payoff_block
+
+    def get_interim_utilities(self, player_index, opponent_indexes):
+        """
+        Vectorized interim utilities: every action is evaluated as a constant bid, and utilities are added up over
+        the opponents' types only.
+        """
+        player_specification = self.player_specifications[player_index]
+        num_actions = len(player_specification.player_actions)
+        num_positions = len(player_specification.get_strategy_catalogue()[0])
+
+        strategy_positions = [player_specification.get_strategy_position(player_type) for player_type in
+                              player_specification.player_types]
+        action_bids = np.array([[NO_BID if strategy_position is None else player_action for strategy_position in
+                                 strategy_positions] for player_action in player_specification.player_actions],
+                               dtype=np.int64)
+
+        bid_tables = list(self.get_bid_tables())
+        bid_tables[player_index] = action_bids
+        type_grid_shape = [len(player_specification.player_types) for player_specification in
+                           self.player_specifications]
+        profiles_per_block = max(1, TYPE_CELLS_PER_BLOCK // reduce(operator.mul, type_grid_shape))
+
+        profile_indexes = np.repeat(opponent_indexes[np.newaxis, :, :], num_actions, axis=0)
+        profile_indexes[:, :, player_index] = np.arange(num_actions)[:, np.newaxis]
+        profile_indexes = profile_indexes.reshape(-1, self.num_players)
+
+        type_utilities = np.zeros((len(profile_indexes), type_grid_shape[player_index]), dtype=np.int64)
+        opponent_axes = tuple(axis + 1 for axis in range(self.num_players) if axis != player_index)
+        for block_start in range(0, len(profile_indexes), profiles_per_block):
+            block_indexes = profile_indexes[block_start:block_start + profiles_per_block]
+            grid_utilities = self.get_type_grid_utilities(block_indexes, bid_tables, type_grid_shape)
+            type_utilities[block_start:block_start + profiles_per_block] = grid_utilities[
+                ..., player_index].sum(axis=opponent_axes)
+
+        type_utilities = type_utilities.reshape(num_actions, len(opponent_indexes), -1)
+        interim_utilities = np.zeros((num_positions, num_actions, len(opponent_indexes)), dtype=np.int64)
+        for type_index, strategy_position in enumerate(strategy_positions):
+            if strategy_position is not None:
+                interim_utilities[strategy_position] = type_utilities[:, :, type_index]
+
+        return interim_utilities
+
+    def get_interim_values(self, player_index, strategy_counts):
+        """
+        Bids of each opponent are independent, so the chance of winning or tying with a bid comes from the product
+        of the opponents' bid distributions. Values are integers, scaled by the number of opponent type profiles,
+        the opponents' strategy totals and the tie multiple.
+        """
+        tie_multiple = self.get_tie_multiple()
+
+        opponent_distributions = []
+        num_outcomes = 1
+        for opponent_index, opponent_specification in enumerate(self.player_specifications):
+            if opponent_index == player_index:
+                continue
+
+            opponent_counts = strategy_counts[opponent_index]
+            num_strategies = int(opponent_counts[0].sum())
+            num_outcomes *= num_strategies * len(opponent_specification.player_types)
+
+            no_bid_mass = 0
+            bid_masses = {}
+            for opponent_type in opponent_specification.player_types:
+                strategy_position = opponent_specification.get_strategy_position(opponent_type)
+                if strategy_position is None:
+                    no_bid_mass += num_strategies
+                    continue
+
+                for opponent_bid, bid_count in zip(opponent_specification.player_actions,
+                                                   opponent_counts[strategy_position]):
+                    bid_masses[opponent_bid] = bid_masses.get(opponent_bid, 0) + int(bid_count)
+
+            opponent_distributions.append((no_bid_mass, bid_masses))
+
+        player_specification = self.player_specifications[player_index]
+        interim_values = [[0 for _ in player_specification.player_actions] for _ in
+                          range(player_specification.get_num_positions())]
+
+        for action_index, player_bid in enumerate(player_specification.player_actions):
+            # Coefficient k: number of outcomes where no opponent bids higher, and k of them tie.
+            tie_coefficients = [1]
+            for no_bid_mass, bid_masses in opponent_distributions:
+                below_mass = no_bid_mass + sum(mass for bid, mass in bid_masses.items() if bid < player_bid)
+                equal_mass = bid_masses.get(player_bid, 0)
+
+                tie_coefficients = [below_mass * coefficient + equal_mass * previous_coefficient for
+                                    coefficient, previous_coefficient in
+                                    zip(tie_coefficients + [0], [0] + tie_coefficients)]
+
+            for player_type in player_specification.player_types:
+                strategy_position = player_specification.get_strategy_position(player_type)
+                if strategy_position is None:
+                    continue
+
+                value = tie_coefficients[0] * self.get_winning_utility(player_type, player_bid) * tie_multiple
+                for num_ties in range(1, len(tie_coefficients)):
+                    value += tie_coefficients[num_ties] * self.get_tie_utility_numerator(player_type, player_bid,
+                                                                                         num_ties + 1)
+
+                num_losses = num_outcomes - sum(tie_coefficients)
+                value += num_losses * self.get_losing_utility(player_bid) * tie_multiple
+                interim_values[strategy_position][action_index] = value
+
+        denominator = len(player_specification.player_types) * num_outcomes * tie_multiple
+        max_value = max(abs(value) for position_values in interim_values for value in position_values)
+        if max_value * len(interim_values) < 2 ** 62:
+            return np.array(interim_values, dtype=np.int64), denominator
+
+        return np.array(interim_values, dtype=object), denominator
+
+    def get_type_grid_utilities(self, profile_indexes, bid_tables, type_grid_shape):
+        tie_multiple = self.get_tie_multiple()
+
+        player_bids = []
+        player_valuations = []
+        for player_index, (bid_table, player_specification) in enumerate(zip(bid_tables,
+                                                                             self.player_specifications)):
+            grid_shape = [1 for _ in range(self.num_players)]
+            grid_shape[player_index] = type_grid_shape[player_index]
+
+            player_bids.append(bid_table[profile_indexes[:, player_index]].reshape([-1] + grid_shape))
+            player_valuations.append(np.array(player_specification.player_types, dtype=np.int64).reshape(
+                [1] + grid_shape))
+
+        max_bid = reduce(np.maximum, player_bids)
+        is_winner = [(bids == max_bid) & (bids != NO_BID) for bids in player_bids]
+        num_winners = reduce(operator.add, [winner.astype(np.int64) for winner in is_winner])
+
+        utilities = []
+        for bids, valuations, winner in zip(player_bids, player_valuations, is_winner):
+            bids = np.where(bids == NO_BID, 0, bids)
+
+            winning_utility = valuations - bids
+            losing_utility = np.zeros_like(bids)
+            if self.all_pay:
+                losing_utility = -bids
+
+            if self.no_ties:
+                tie_utility = losing_utility * tie_multiple
+            else:
+                tie_utility = (winning_utility + (num_winners - 1) * losing_utility) * (
+                        tie_multiple // np.maximum(num_winners, 1))
+
+            utility = np.where(winner, np.where(num_winners == 1, winning_utility * tie_multiple, tie_utility),
+                               losing_utility * tie_multiple)
+            utilities.append(np.broadcast_to(utility, max_bid.shape))
+
+        return np.stack(utilities, axis=-1)
+
+    def get_expected_utility_numerators(self, strategy_profile):
+        types_iterator = itertools.product(
+            *[player_specification.player_types for player_specification in self.player_specifications])
+
+        # Type profiles are equally likely, so their utilities are simply added up.
+        expected_numerators = [0 for _ in range(self.num_players)]
+        for player_types in types_iterator:
+            utility_numerators = self.get_utility_numerators(player_types, strategy_profile)
+            expected_numerators = [previous_value + current_value for previous_value, current_value in
+                                   zip(expected_numerators, utility_numerators)]
+
+        return expected_numerators
+
+    def get_expected_utilities(self, strategy_profile):
+        denominator = self.get_payoff_denominator()
+        return [Fraction(numerator, denominator) for numerator in
+                self.get_expected_utility_numerators(strategy_profile)]
+
     def get_utility(self, player_types, strategy_profile):
+        tie_multiple = self.get_tie_multiple()
+        return [Fraction(numerator, tie_multiple) for numerator in
+                self.get_utility_numerators(player_types, strategy_profile)]
+
+    def get_utility_numerators(self, player_types, strategy_profile):
 
         player_bids = self.get_player_bids(player_types, strategy_profile)
 
         max_bid = max([bid for bid in player_bids if bid is not None])
         winners = [player_index for player_index, player_bid in enumerate(player_bids) if player_bid == max_bid]
 
-        utilities = [0.0 for _ in range(self.num_players)]
+        tie_multiple = self.get_tie_multiple()
+        utilities = [0 for _ in range(self.num_players)]
         num_winners = len(winners)
         for player_index, player_type, player_bid in zip(range(self.num_players), player_types, player_bids):
 
             if num_winners == 1 and player_index in winners:
-                utilities[player_index] = self.get_winning_utility(player_type, player_bid)
+                utilities[player_index] = self.get_winning_utility(player_type, player_bid) * tie_multiple
             elif num_winners > 1 and player_index in winners:
-                utilities[player_index] = self.get_tie_utility(player_type, player_bid, num_winners)
+                utilities[player_index] = self.get_tie_utility_numerator(player_type, player_bid, num_winners)
             else:
-                utilities[player_index] = self.get_losing_utility(player_bid)
+                utilities[player_index] = self.get_losing_utility(player_bid) * tie_multiple
 
         return utilities
 
@@ -64,20 +297,23 @@ class FirstPriceAuction(BayesianGame):
         return loser_utility
 
     def get_tie_utility(self, player_type, player_bid, num_winners):
+        return Fraction(self.get_tie_utility_numerator(player_type, player_bid, num_winners), self.get_tie_multiple())
+
+    def get_tie_utility_numerator(self, player_type, player_bid, num_winners):
+        tie_multiple = self.get_tie_multiple()
 
         if self.no_ties:
-            return self.get_losing_utility(player_bid)
+            return self.get_losing_utility(player_bid) * tie_multiple
         else:
-
-            return Fraction((num_winners - 1) * self.get_losing_utility(player_bid),
-                            num_winners) + Fraction(
-                self.get_winning_utility(player_type, player_bid), num_winners)
+            return ((num_winners - 1) * self.get_losing_utility(player_bid) +
+                    self.get_winning_utility(player_type, player_bid)) * (tie_multiple // num_winners)
 
 
 class AuctionPlayerSpecification(PlayerSpecification):
 
     def __init__(self, player_types, player_actions, no_jumps):
         self.no_jumps = no_jumps
+        self.bid_table = None
         super(AuctionPlayerSpecification, self).__init__(player_types=player_types,
                                                          player_actions=player_actions)
 
@@ -88,18 +324,109 @@ class AuctionPlayerSpecification(PlayerSpecification):
                    no_jumps=player_specification.no_jumps)
 
     def get_num_strategies(self):
-        pass
+        """
+        Counts the strategies reaching every bid, position by position, without enumerating them.
+        """
+        strategy_counts = [1] + [0] * (len(self.player_actions) - 1)
+
+        for strategy_position in range(1, self.get_num_positions()):
+            starts, stops = self.get_successor_ranges(strategy_position)
+            count_changes = [0] * (len(self.player_actions) + 1)
+
+            for previous_count, start, stop in zip(strategy_counts, starts, stops):
+                if previous_count and start < stop:
+                    count_changes[start] += previous_count
+                    count_changes[stop] -= previous_count
+
+            strategy_counts = list(itertools.accumulate(count_changes[:-1]))
+
+        return sum(strategy_counts)
+
+    def get_bid(self, player_type, player_strategy):
+        strategy_position = self.get_strategy_position(player_type)
+        if strategy_position is None:
+            return None
+
+        return player_strategy[strategy_position]
+
+    def set_strategy_catalogue(self, strategy_catalogue):
+        super(AuctionPlayerSpecification, self).set_strategy_catalogue(strategy_catalogue)
+        self.bid_table = None
+
+    def get_bid_table(self):
+        """
+        Tabulates the bid of every strategy in the catalogue for every type. Types that don't bid are marked as NO_BID.
+        :return: Array of shape (number of strategies, number of types).
+        """
+        if self.bid_table is None:
+            bid_table = [[self.get_bid(player_type, player_strategy) for player_type in self.player_types]
+                         for player_strategy in self.get_strategy_catalogue()]
+            bid_table = [[NO_BID if bid is None else bid for bid in bid_row] for bid_row in bid_table]
+            self.bid_table = np.array(bid_table, dtype=np.int64).reshape(-1, len(self.player_types))
+
+        return self.bid_table
 
     def initialize_pure_strategies(self):
+        """
+        Weakly-increasing bid vectors, starting at the lowest action. Strategies are grouped by their last bid, in the
+        order each last bid is first reached, and sorted lexicographically within each group.
+        """
         if self.no_jumps:
             logging.info("Jumpy strategies are excluded!")
 
-        bidding_graph = nx.DiGraph()
-        parent_node = (self.player_types[0], self.player_actions[0])
-        bidding_graph.add_node(parent_node)
+        successor_ranges = self.get_all_successor_ranges()
+        for _, completion_counts in self.get_last_bid_groups(successor_ranges):
+            yield from self.get_paths(successor_ranges, completion_counts > 0)
+
+    def get_position_valuations(self):
+        return list(self.player_types)
+
+    def get_num_positions(self):
+        return len(self.get_position_valuations())
+
+    def get_best_strategy(self, interim_values):
+        """
+        Dynamic programming over strategy positions: for every bid at the current position, keep the best-valued
+        strategy prefix ending there. Ties are broken in favour of lower bids.
+        """
+        num_actions = len(self.player_actions)
+
+        is_reachable = np.zeros(num_actions, dtype=bool)
+        is_reachable[0] = True
+        prefix_values = np.zeros(num_actions, dtype=interim_values.dtype)
+        prefix_values[0] = interim_values[0, 0]
+        previous_indexes = []
+
+        for strategy_position in range(1, self.get_num_positions()):
+            starts, stops = self.get_successor_ranges(strategy_position)
+            next_reachable = np.zeros(num_actions, dtype=bool)
+            next_values = np.zeros(num_actions, dtype=interim_values.dtype)
+            next_previous = np.zeros(num_actions, dtype=np.int64)
+
+            for previous_index in np.flatnonzero(is_reachable):
+                start, stop = starts[previous_index], stops[previous_index]
+
+                improves = ~next_reachable[start:stop] | (next_values[start:stop] < prefix_values[previous_index])
+                improved_indexes = np.flatnonzero(improves) + start
+                next_reachable[improved_indexes] = True
+                next_values[improved_indexes] = prefix_values[previous_index]
+                next_previous[improved_indexes] = previous_index
 
-        self.add_bids(type_index=1, bidding_graph=bidding_graph, parent_node=parent_node)
-        return self.get_strategies_from_graph(parent_node, bidding_graph)
+            if not next_reachable.any():
+                raise ValueError("No strategy can place a bid at position " + str(strategy_position))
+
+            next_values[next_reachable] += interim_values[strategy_position][next_reachable]
+            is_reachable, prefix_values = next_reachable, next_values
+            previous_indexes.append(next_previous)
+
+        reachable_indexes = np.flatnonzero(is_reachable)
+        action_index = int(reachable_indexes[np.argmax(prefix_values[reachable_indexes])])
+        action_indexes = [action_index]
+        for next_previous in reversed(previous_indexes):
+            action_index = int(next_previous[action_index])
+            action_indexes.append(action_index)
+
+        return tuple(self.player_actions[action_index] for action_index in reversed(action_indexes))
 
     def get_bid_range(self, valuation, previous_bid):
         max_bid = valuation
@@ -114,32 +441,211 @@ class AuctionPlayerSpecification(PlayerSpecification):
 
         return [bid for bid in self.player_actions if min_bid <= bid <= max_bid]
 
-    def add_bids(self, type_index, bidding_graph, parent_node):
-        if type_index == len(self.player_types):
-            return
+    def get_definition(self):
+        # Bid ranges cover any get_bid_range override, such as the ones in customspec.
+        definition = super(AuctionPlayerSpecification, self).get_definition()
+        definition["no_jumps"] = self.no_jumps
+        definition["bid_ranges"] = [[starts.tolist(), stops.tolist()] for starts, stops in
+                                    self.get_all_successor_ranges()]
+        return definition
+
+    def get_strategy_catalogue(self):
+        if self.strategy_catalogue is None:
+            self.strategy_catalogue = MonotoneStrategyCatalogue(self)
+            logging.info("Pure strategies obtained: " + str(self.strategy_catalogue.get_num_strategies()))
+
+        return self.strategy_catalogue
+
+    def get_strategy_index(self, player_strategy):
+        if self.restricted:
+            return super(AuctionPlayerSpecification, self).get_strategy_index(player_strategy)
+
+        return self.get_strategy_catalogue().index(tuple(player_strategy))
+
+    def get_successor_ranges(self, strategy_position):
+        """
+        :return: For every previous bid, the start and stop indexes of the actions allowed at this position.
+        """
+        valuation = self.get_position_valuations()[strategy_position]
+        bid_ranges = [self.get_bid_range(valuation, previous_bid) for previous_bid in self.player_actions]
+
+        player_actions = np.array(self.player_actions)
+        starts = np.searchsorted(player_actions, [min_bid for min_bid, _ in bid_ranges], side="left")
+        stops = np.searchsorted(player_actions, [max_bid for _, max_bid in bid_ranges], side="right")
+
+        return starts, np.maximum(starts, stops)
+
+    def get_all_successor_ranges(self):
+        return [self.get_successor_ranges(strategy_position) for strategy_position in
+                range(1, self.get_num_positions())]
+
+    def get_completion_counts(self, successor_ranges, last_index):
+        """
+        :return: Per strategy position and action, the number of ways to complete a strategy ending at last_index.
+        """
+        completion_counts = np.zeros((len(successor_ranges) + 1, len(self.player_actions)), dtype=object)
+        completion_counts[-1, last_index] = 1
+
+        for strategy_position in range(len(successor_ranges) - 1, -1, -1):
+            starts, stops = successor_ranges[strategy_position]
+            completed = np.concatenate(([0], np.cumsum(completion_counts[strategy_position + 1])))
+            completion_counts[strategy_position] = completed[stops] - completed[starts]
+
+        completion_counts[0, 1:] = 0
+        return completion_counts
+
+    def get_last_bid_groups(self, successor_ranges):
+        """
+        :return: Last bid index and completion counts of every group of strategies, in enumeration order.
+        """
+        last_bid_groups = []
+        for last_index in range(len(self.player_actions)):
+            completion_counts = self.get_completion_counts(successor_ranges, last_index)
+            if completion_counts[0][0]:
+                first_path = self.get_first_path(successor_ranges, completion_counts > 0)
+                last_bid_groups.append((first_path, last_index, completion_counts))
+
+        return [(last_index, completion_counts) for _, last_index, completion_counts in
+                sorted(last_bid_groups, key=lambda last_bid_group: last_bid_group[0])]
 
-        valuation = self.player_types[type_index]
-        previous_bid = parent_node[1]
-        valid_bids = self.get_bid_options(valuation=valuation, previous_bid=previous_bid)
+    @staticmethod
+    def get_first_path(successor_ranges, completions):
+        action_indexes = [0]
+        for strategy_position, (starts, stops) in enumerate(successor_ranges):
+            start = starts[action_indexes[-1]]
+            action_indexes.append(int(start + np.argmax(completions[strategy_position + 1, start:])))
+
+        return tuple(action_indexes)
+
+    def get_paths(self, successor_ranges, completions):
+        """
+        Iterative depth-first search, only visiting actions that can be completed.
+        """
+        num_positions = len(successor_ranges) + 1
+        get_action = list(self.player_actions).__getitem__
+
+        # Per position and previous action, the actions to visit next, in reverse order.
+        candidate_indexes = []
+        for strategy_position, (starts, stops) in enumerate(successor_ranges):
+            position_completions = completions[strategy_position + 1]
+            candidate_indexes.append([(np.flatnonzero(position_completions[start:stop]) + start)[::-1].tolist()
+                                      for start, stop in zip(starts, stops)])
+
+        action_indexes = [0]
+        pending_indexes = []
+
+        while True:
+            if len(action_indexes) == num_positions:
+                yield tuple(map(get_action, action_indexes))
+            else:
+                pending_indexes.append(candidate_indexes[len(action_indexes) - 1][action_indexes[-1]][:])
+                action_indexes.append(None)
 
-        for bid in valid_bids:
-            bid_per_valuation = (valuation, bid)
-            bidding_graph.add_edge(parent_node, bid_per_valuation)
-            self.add_bids(type_index=type_index + 1, bidding_graph=bidding_graph, parent_node=bid_per_valuation)
+            while pending_indexes and not pending_indexes[-1]:
+                pending_indexes.pop()
+                action_indexes.pop()
 
-    @staticmethod
-    def get_strategies_from_graph(parent_node, bidding_graph):
-        pure_strategies = []
-        logging.debug("bidding_graph: ", bidding_graph.edges)
+            if not pending_indexes:
+                return
+
+            action_indexes[-1] = pending_indexes[-1].pop()
 
-        for node in bidding_graph:
-            logging.debug("node", node, "bidding_graph.out_degree(node)", bidding_graph.out_degree(node))
 
-            if bidding_graph.out_degree(node) == 0:
-                pure_strategies.append(map(lambda path: tuple(bid for _, bid in path),
-                                           nx.all_simple_paths(bidding_graph, source=parent_node, target=node)))
+class MonotoneStrategyCatalogue(Sequence):
+    """
+    The strategies of an AuctionPlayerSpecification, in enumeration order, without storing them. A strategy's index
+    is its group offset plus, at every position, the number of completions of the lower bids allowed there.
+    """
 
-        return itertools.chain.from_iterable(pure_strategies)
+    def __init__(self, player_specification):
+        self.player_specification = player_specification
+        self.player_actions = list(player_specification.player_actions)
+        self.successor_ranges = player_specification.get_all_successor_ranges()
+
+        self.last_indexes = []
+        self.group_offsets = [0]
+        # Per group and position, running totals of completions over the actions.
+        self.cumulative_counts = []
+        for last_index, completion_counts in player_specification.get_last_bid_groups(self.successor_ranges):
+            self.last_indexes.append(last_index)
+            self.group_offsets.append(self.group_offsets[-1] + completion_counts[0][0])
+            self.cumulative_counts.append([[0] + list(itertools.accumulate(position_counts)) for position_counts in
+                                           completion_counts])
+
+    def get_num_strategies(self):
+        return self.group_offsets[-1]
+
+    def __len__(self):
+        return self.get_num_strategies()
+
+    def __iter__(self):
+        return self.player_specification.initialize_pure_strategies()
+
+    def __getitem__(self, strategy_index):
+        if isinstance(strategy_index, slice):
+            return [self[index] for index in range(*strategy_index.indices(self.get_num_strategies()))]
+
+        if strategy_index < 0:
+            strategy_index += self.get_num_strategies()
+        if not 0 <= strategy_index < self.get_num_strategies():
+            raise IndexError("Strategy index out of range: " + str(strategy_index))
+
+        group_index = bisect.bisect_right(self.group_offsets, strategy_index) - 1
+        group_rank = strategy_index - self.group_offsets[group_index]
+        cumulative_counts = self.cumulative_counts[group_index]
+
+        action_indexes = [0]
+        for strategy_position, (starts, stops) in enumerate(self.successor_ranges):
+            position_counts = cumulative_counts[strategy_position + 1]
+            target = position_counts[starts[action_indexes[-1]]] + group_rank
+            action_index = bisect.bisect_right(position_counts, target) - 1
+
+            group_rank = target - position_counts[action_index]
+            action_indexes.append(action_index)
+
+        return tuple(self.player_actions[action_index] for action_index in action_indexes)
+
+    def index(self, player_strategy, *args):
+        try:
+            action_indexes = [self.player_specification.get_action_index(action) for action in player_strategy]
+            group_index = self.last_indexes.index(action_indexes[-1])
+        except (KeyError, ValueError, IndexError):
+            raise ValueError(str(player_strategy) + " is not in the catalogue")
+
+        cumulative_counts = self.cumulative_counts[group_index]
+        if len(action_indexes) != len(cumulative_counts) or action_indexes[0] != 0:
+            raise ValueError(str(player_strategy) + " is not in the catalogue")
+
+        strategy_index = self.group_offsets[group_index]
+        for strategy_position, (starts, stops) in enumerate(self.successor_ranges):
+            previous_index, action_index = action_indexes[strategy_position], action_indexes[strategy_position + 1]
+            position_counts = cumulative_counts[strategy_position + 1]
+
+            if not starts[previous_index] <= action_index < stops[previous_index] or \
+                    position_counts[action_index + 1] == position_counts[action_index]:
+                raise ValueError(str(player_strategy) + " is not in the catalogue")
+
+            strategy_index += position_counts[action_index] - position_counts[starts[previous_index]]
+
+        return strategy_index
+
+    def __contains__(self, player_strategy):
+        try:
+            self.index(player_strategy)
+        except ValueError:
+            return False
+
+        return True
+
+    def __eq__(self, other):
+        if isinstance(other, MonotoneStrategyCatalogue) and self.player_actions == other.player_actions and len(
+                self.successor_ranges) == len(other.successor_ranges):
+            if all(np.array_equal(starts, other_starts) and np.array_equal(stops, other_stops) for
+                   (starts, stops), (other_starts, other_stops) in zip(self.successor_ranges, other.successor_ranges)):
+                return True
+
+        return isinstance(other, Sequence) and len(self) == len(other) and all(
+            strategy == other_strategy for strategy, other_strategy in zip(self, other))
 
 
 class GnuthPlayerSpecification(AuctionPlayerSpecification):
@@ -161,34 +667,14 @@ class PezanisPlayerSpecification(AuctionPlayerSpecification):
                                                          player_actions=player_actions,
                                                          no_jumps=no_jumps)
 
-    def initialize_pure_strategies(self):
-        if self.no_jumps:
-            logging.info("Jumpy strategies are excluded!")
-
-        bidding_graph = nx.DiGraph()
-
-        parent_node = (self.player_actions[0], self.player_actions[0])
-        bidding_graph.add_node(parent_node)
-        self.add_bids(action_index=1, bidding_graph=bidding_graph, parent_node=parent_node)
-
-        return self.get_strategies_from_graph(parent_node, bidding_graph)
-
-    def add_bids(self, action_index, bidding_graph, parent_node):
-        if action_index == len(self.player_actions):
-            return
-
-        valuation = self.get_action_index(action_index)
-        previous_bid = parent_node[1]
-        max_bid = valuation
-        if self.no_jumps:
-            max_bid = previous_bid + 1
+    def get_position_valuations(self):
+        return list(self.player_actions)
 
-        valid_bids = [bid for bid in self.player_actions if previous_bid <= bid <= max_bid]
+    def get_strategy_position(self, player_type):
+        if player_type >= 0:
+            return self.get_action_index(player_type)
 
-        for bid in valid_bids:
-            bid_per_valuation = (valuation, bid)
-            bidding_graph.add_edge(parent_node, bid_per_valuation)
-            self.add_bids(action_index=action_index + 1, bidding_graph=bidding_graph, parent_node=bid_per_valuation)
+        return None
 
     def get_strategy_description(self, strategy):
         strategy_description = ""
@@ -207,18 +693,3 @@ class PezanisAuction(FirstPriceAuction):
         super(PezanisAuction, self).__init__(
             game_name=game_name,
             player_specifications=player_specifications)
-
-    def get_number_of_entries(self):
-        pass
-
-    def get_player_bids(self, player_types, strategy_profile):
-
-        bids = [None for _ in range(self.num_players)]
-
-        for player_index, player_type, player_strategy, player_specification in zip(range(self.num_players),
-                                                                                    player_types, strategy_profile,
-                                                                                    self.player_specifications):
-            if player_type >= 0:
-                bids[player_index] = player_strategy[player_specification.get_action_index(player_type)]
-
-        return bids
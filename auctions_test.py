@@ -1,7 +1,16 @@
+import itertools
+import os
+import sys
+import tempfile
 import unittest
 from fractions import Fraction
+from unittest import mock
 
-from auctions import FirstPriceAuction, GnuthPlayerSpecification, PezanisAuction, AuctionPlayerSpecification
+import numpy as np
+
+import gambitutils
+from auctions import FirstPriceAuction, GnuthPlayerSpecification, PezanisAuction, AuctionPlayerSpecification, NO_BID
+from gamebuilder import PayoffTensorGame
 
 
 class GnuthAuctionTest(unittest.TestCase):
@@ -78,6 +87,49 @@ class GnuthAuctionTest(unittest.TestCase):
                 (strong_bidder_index, other_strong_bidder_strategy)] == "1"
             self.assertTrue(strong_equilibrium)
 
+    def test_calculate_pure_equilibria(self):
+        actual_equilibria = self.sample_auction.calculate_equilibria(only_pure=True, in_process=True)
+        self.assertEqual(len(actual_equilibria), 2)
+
+        for equilibrium in actual_equilibria:
+            weak_bidder_strategy = self.opponent_specification.get_strategy_index((50, 50))
+            weak_bidder_index = 1
+            self.assertEqual(equilibrium[(weak_bidder_index, weak_bidder_strategy)], "1")
+
+            strong_bidder_index = 0
+            strong_bidder_strategy = self.player_specification.get_strategy_index((50, 50, 50))
+            other_strong_bidder_strategy = self.player_specification.get_strategy_index((50, 50, 51))
+
+            strong_equilibrium = equilibrium[(strong_bidder_index, strong_bidder_strategy)] == "1" or equilibrium[
+                (strong_bidder_index, other_strong_bidder_strategy)] == "1"
+            self.assertTrue(strong_equilibrium)
+
+    def test_interim_values(self):
+        strategy_catalogues = self.sample_auction.get_strategy_catalogues()
+        payoff_tensor = self.sample_auction.get_payoff_tensor()
+        denominator = self.sample_auction.get_payoff_denominator()
+
+        for strategy_profile in itertools.product(*strategy_catalogues):
+            strategy_counts = [specification.get_strategy_counts(player_strategy) for specification, player_strategy
+                               in zip(self.sample_auction.player_specifications, strategy_profile)]
+            profile_index = tuple(strategy_catalogue.index(player_strategy) for strategy_catalogue, player_strategy
+                                  in zip(strategy_catalogues, strategy_profile))
+
+            for player_index, player_specification in enumerate(self.sample_auction.player_specifications):
+                interim_values, value_denominator = self.sample_auction.get_interim_values(player_index,
+                                                                                           strategy_counts)
+                actual_utility = Fraction(
+                    int(player_specification.get_strategy_value(interim_values, strategy_profile[player_index])),
+                    value_denominator)
+                expected_utility = Fraction(int(payoff_tensor[profile_index + (player_index,)]), denominator)
+                self.assertEqual(actual_utility, expected_utility)
+
+    def test_best_response_dynamics(self):
+        strong_strategy, weak_strategy = self.sample_auction.calculate_best_response_dynamics()
+
+        self.assertEqual(weak_strategy, (50, 50))
+        self.assertIn(strong_strategy, [(50, 50, 50), (50, 50, 51)])
+
 
 class FirstPriceThreeBiddersTest(unittest.TestCase):
 
@@ -109,6 +161,142 @@ class FirstPriceThreeBiddersTest(unittest.TestCase):
                                                   all_pay=True,
                                                   no_ties=False)
 
+    def test_payoff_tensor(self):
+        for auction in [self.auction_no_ties, self.auction_with_ties, self.allpay_with_ties]:
+            self.assertTrue(auction.is_symmetric())
+            payoff_tensor = auction.get_payoff_tensor()
+            denominator = auction.get_payoff_denominator()
+            strategy_catalogues = auction.get_strategy_catalogues()
+
+            for strategy_indexes in itertools.product(*[range(len(catalogue)) for catalogue in strategy_catalogues]):
+                profile = tuple(catalogue[index] for catalogue, index in zip(strategy_catalogues, strategy_indexes))
+
+                expected_utilities = auction.get_expected_utilities(profile)
+                actual_utilities = [Fraction(int(numerator), denominator) for numerator in
+                                    payoff_tensor[strategy_indexes]]
+                self.assertEqual(actual_utilities, expected_utilities)
+
+    def test_calculate_pure_equilibria(self):
+        actual_equilibria = self.auction_with_ties.calculate_equilibria(only_pure=True, in_process=True)
+        self.assertEqual(len(actual_equilibria), 1)
+
+        strategy_index = self.player_specification.get_strategy_index((0, 0, 1))
+        for player_index in range(3):
+            self.assertEqual(actual_equilibria[0][(player_index, strategy_index)], "1")
+
+    def test_symmetric_payoffs(self):
+        num_strategies = len(self.player_specification.get_strategy_catalogue())
+        self.assertEqual(len(self.auction_with_ties.get_symmetric_payoffs()), 35)
+
+        profile_indexes = self.auction_with_ties.get_profile_indexes(0, num_strategies ** 3)
+        self.assertTrue(np.array_equal(self.auction_with_ties.get_profile_payoffs(profile_indexes),
+                                       self.auction_with_ties.get_payoff_block(profile_indexes)))
+
+    def test_nfg_estimates(self):
+        nfg_file, _ = self.auction_no_ties.to_nfg_file()
+        self.auction_no_ties.symmetric_payoffs = None
+
+        profile_entries, file_size, _ = self.auction_no_ties.get_nfg_estimates(sample_size=7)
+        self.assertIsNone(self.auction_no_ties.symmetric_payoffs)
+        self.assertEqual(profile_entries, 125)
+        self.assertAlmostEqual(file_size / os.path.getsize(nfg_file), 1, delta=0.1)
+
+    @mock.patch("gamebuilder.PROFILE_BLOCK_SIZE", 7)
+    def test_to_nfg_file_workers(self):
+        nfg_file, _ = self.allpay_with_ties.to_nfg_file()
+        with open(nfg_file) as nfg_content:
+            expected_content = nfg_content.read()
+
+        nfg_file, _ = self.allpay_with_ties.to_nfg_file(workers=2)
+        with open(nfg_file) as nfg_content:
+            actual_content = nfg_content.read()
+
+        self.assertEqual(actual_content, expected_content)
+
+    @mock.patch("gamebuilder.PROFILE_BLOCK_SIZE", 7)
+    @mock.patch("gambitutils.NFG_BUFFER_SIZE", 1)
+    def test_to_nfg_file_resume(self):
+        nfg_file, _ = self.allpay_with_ties.to_nfg_file()
+        with open(nfg_file) as nfg_content:
+            expected_content = nfg_content.read()
+
+        get_payoff_lines = self.allpay_with_ties.get_payoff_lines
+        payoff_calls = []
+
+        def interrupted_payoff_lines(block_start, *args):
+            payoff_calls.append(block_start)
+            if payoff_calls == [0, 7, 14, 21]:
+                raise InterruptedError()
+            return get_payoff_lines(block_start, *args)
+
+        with mock.patch.object(self.allpay_with_ties, "get_payoff_lines", side_effect=interrupted_payoff_lines):
+            self.assertRaises(InterruptedError, self.allpay_with_ties.to_nfg_file)
+
+            payoff_calls.clear()
+            self.allpay_with_ties.to_nfg_file(resume=True)
+
+        self.assertEqual(payoff_calls[0], 21)
+        with open(nfg_file) as nfg_content:
+            self.assertEqual(nfg_content.read(), expected_content)
+        self.assertFalse(os.path.exists(gambitutils.get_checkpoint_file(nfg_file)))
+
+    def test_save_payoff_tensor(self):
+        with tempfile.TemporaryDirectory() as tensor_directory:
+            file_prefix = os.path.join(tensor_directory, self.auction_with_ties.game_name)
+            self.auction_with_ties.save_payoff_tensor(file_prefix)
+
+            saved_auction = PayoffTensorGame.from_file(file_prefix)
+            self.assertEqual(saved_auction.get_payoff_denominator(), self.auction_with_ties.get_payoff_denominator())
+            self.assertEqual(saved_auction.calculate_pure_equilibria(),
+                             self.auction_with_ties.calculate_pure_equilibria())
+
+            del saved_auction
+
+    def test_from_nfg_file(self):
+        for payoff_version in [False, True]:
+            nfg_file, _ = self.auction_with_ties.to_nfg_file(payoff_version=payoff_version)
+
+            nfg_auction = PayoffTensorGame.from_nfg_file(nfg_file, chunk_size=64)
+            self.assertEqual(nfg_auction.get_strategy_descriptions(), self.auction_with_ties.get_strategy_descriptions())
+            self.assertTrue(np.array_equal(
+                nfg_auction.get_payoff_tensor() * self.auction_with_ties.get_payoff_denominator(),
+                self.auction_with_ties.get_payoff_tensor() * nfg_auction.get_payoff_denominator()))
+            self.assertEqual(nfg_auction.calculate_pure_equilibria(),
+                             self.auction_with_ties.calculate_pure_equilibria())
+
+    def test_pipe_game(self):
+        solver_script = """#!{python}
+import sys
+sys.path.insert(0, {repository!r})
+import gambitutils, gamebuilder
+
+_, strategy_catalogues, payoff_table, _ = gambitutils.NfgReader(sys.stdin).read()
+payoff_tensor = payoff_table.reshape([len(catalogue) for catalogue in strategy_catalogues] +
+                                     [len(strategy_catalogues)], order="F")
+for strategy_indexes in gamebuilder.get_pure_equilibria(payoff_tensor):
+    print("NE," + ",".join("1" if strategy_index == equilibrium_index else "0" for catalogue, equilibrium_index in
+                           zip(strategy_catalogues, strategy_indexes) for strategy_index in range(len(catalogue))))
+""".format(python=sys.executable, repository=os.path.dirname(os.path.abspath(__file__)))
+
+        expected_file, _ = self.auction_with_ties.to_nfg_file()
+        with open(expected_file) as nfg_content:
+            expected_content = nfg_content.read()
+        os.remove(expected_file)
+
+        with tempfile.TemporaryDirectory() as solver_directory, mock.patch("gambitutils.GAMBIT_DIR",
+                                                                           solver_directory + os.sep):
+            # A stand-in for gambit-enumpure, that reads the game from its standard input.
+            solver_file = os.path.join(solver_directory, gambitutils.PURE_EQUILIBRIA)
+            with open(solver_file, "w") as solver_content:
+                solver_content.write(solver_script)
+            os.chmod(solver_file, 0o755)
+
+            self.assertEqual(self.auction_with_ties.calculate_equilibria(pipe_game=True, keep_nfg_file=True),
+                             self.auction_with_ties.calculate_pure_equilibria())
+
+        with open(expected_file) as nfg_content:
+            self.assertEqual(nfg_content.read(), expected_content)
+
     def test_allpay_ties_auction(self):
         expected_player_utility = Fraction(1, 3)
         expected_opponent_utility = Fraction(1, 3)
@@ -271,6 +459,33 @@ class FirstPriceAuctionTest(unittest.TestCase):
         opponent_strategies = list(self.opponent_specification.get_pure_strategies())
         self.assertEqual(sorted(opponent_strategies), sorted(player_strategies))
 
+    def test_monotone_strategies(self):
+        player_valuations = range(0, 6)
+
+        for no_jumps in [False, True]:
+            player_specification = AuctionPlayerSpecification(player_actions=player_valuations,
+                                                              player_types=player_valuations, no_jumps=no_jumps)
+            max_increase = 1 if no_jumps else len(player_valuations)
+            expected_strategies = [bids for bids in itertools.product(player_valuations, repeat=len(player_valuations))
+                                   if bids[0] == 0 and
+                                   all(previous_bid <= bid <= min(valuation, previous_bid + max_increase) for
+                                       previous_bid, bid, valuation in zip(bids, bids[1:], player_valuations[1:]))]
+            # Grouped by the last bid, in lexicographic order within each group.
+            expected_strategies = sorted(expected_strategies, key=lambda bids: (bids[-1], bids))
+
+            actual_strategies = list(player_specification.initialize_pure_strategies())
+            self.assertEqual(actual_strategies, expected_strategies)
+            self.assertEqual(player_specification.get_num_strategies(), len(expected_strategies))
+
+            strategy_catalogue = player_specification.get_strategy_catalogue()
+            self.assertEqual(len(strategy_catalogue), len(expected_strategies))
+            for strategy_index, player_strategy in enumerate(expected_strategies):
+                self.assertEqual(strategy_catalogue[strategy_index], player_strategy)
+                self.assertEqual(strategy_catalogue.index(player_strategy), strategy_index)
+
+            self.assertNotIn((0, 2, 1, 3, 4, 5), strategy_catalogue)
+            self.assertRaises(IndexError, strategy_catalogue.__getitem__, len(expected_strategies))
+
     def test_first_price_utilities(self):
         expected_player_utility = Fraction(1, 2)
         expected_opponent_utility = Fraction(1, 2)
@@ -312,6 +527,39 @@ class FirstPriceAuctionTest(unittest.TestCase):
         self.assertEqual(actual_player_utility, expected_player_utility)
         self.assertEqual(actual_opponent_utility, expected_opponent_utility)
 
+    def test_bid_table(self):
+        bid_table = self.player_specification.get_bid_table()
+        self.assertEqual(bid_table.shape, (5, 3))
+
+        strategy_index = self.player_specification.get_strategy_index((0, 1, 2))
+        self.assertEqual(list(bid_table[strategy_index]), [0, 1, 2])
+
+    def test_eliminate_dominated_strategies(self):
+        another_auction = FirstPriceAuction(game_name="first_price_auction",
+                                             player_specifications=[self.player_specification,
+                                                                    self.opponent_specification], all_pay=False,
+                                             no_ties=False)
+        elimination_log = another_auction.eliminate_dominated_strategies()
+
+        expected_strategies = [(0, 0, 0), (0, 0, 1)]
+        for player_strategies in another_auction.get_strategy_catalogues():
+            self.assertEqual(player_strategies, expected_strategies)
+
+        self.assertIn((0, (0, 1, 1), (0, 0, 1)), elimination_log)
+        self.assertEqual(len(self.player_specification.get_strategy_catalogue()), 5)
+
+    def test_utility_numerators(self):
+        self.assertEqual(self.all_pay_auction.get_payoff_denominator(), 18)
+
+        player_strategy = (0, 0, 1)
+        opponent_strategy = (0, 1, 2)
+        actual_numerators = self.all_pay_auction.get_expected_utility_numerators((player_strategy, opponent_strategy))
+        self.assertEqual(actual_numerators, [1, -1])
+
+        actual_numerators = self.first_price_auction.get_expected_utility_numerators(
+            (player_strategy, opponent_strategy))
+        self.assertEqual(actual_numerators, [4, 0])
+
     def test_all_pay_utilities(self):
         expected_player_utility = Fraction(1, 2)
         expected_opponent_utility = Fraction(1, 2)
@@ -411,6 +659,28 @@ class PezanisAuctionTest(unittest.TestCase):
         self.player_specification = self.sample_auction.player_specifications[0]
         self.opponent_specification = self.sample_auction.player_specifications[1]
 
+    def test_bid_table(self):
+        bid_table = self.opponent_specification.get_bid_table()
+        strategy_index = self.opponent_specification.get_strategy_index((0, 1, 2))
+
+        self.assertEqual(list(bid_table[strategy_index]), [NO_BID] * 6 + [0, 1, 2])
+
+    def test_number_of_entries(self):
+        expected_entries = len(self.player_specification.get_strategy_catalogue()) * len(
+            self.opponent_specification.get_strategy_catalogue())
+        self.assertEqual(self.sample_auction.get_number_of_entries(), expected_entries)
+
+    def test_payoff_tensor(self):
+        self.assertFalse(self.sample_auction.is_symmetric())
+        payoff_tensor = self.sample_auction.get_payoff_tensor()
+        denominator = self.sample_auction.get_payoff_denominator()
+        strong_bidder_strategy = self.player_specification.get_strategy_index((0, 0, 2))
+        weak_bidder_strategy = self.opponent_specification.get_strategy_index((0, 1, 1))
+
+        actual_strong_utility, actual_weak_utility = payoff_tensor[strong_bidder_strategy, weak_bidder_strategy]
+        self.assertEqual(Fraction(int(actual_strong_utility), denominator), Fraction(13, 54))
+        self.assertEqual(Fraction(int(actual_weak_utility), denominator), Fraction(2, 27))
+
     def test_no_jumpy_strategies(self):
         another_sample_auction = PezanisAuction(game_name="pezanis_auction", player_valuations=[[0, 1, 2],
                                                                                                 [-6, -5, -4, -3, -2, -1,
@@ -3,6 +3,8 @@ import time
 
 from auctions import GnuthPlayerSpecification, FirstPriceAuction, PezanisAuction, AuctionPlayerSpecification
 from customspec import SevenPlayerSpecification, ThreePlayersFirsPriceTiesSpec, CustomWeaklyIncreasing
+from gamecache import GameCache
+from sweeprunner import get_game_name, get_sweep_configurations, run_sweep
 
 
 def do_pezanis_experiments():
@@ -81,7 +83,7 @@ def do_first_price_experiments():
     logging.info("--- %s seconds ---" % (time.time() - start_time))
 
 
-def do_custom_valuations(num_players=2, no_jumps=False, no_ties=False, all_pay=False, range_list=[]):
+def do_custom_valuations(num_players=2, no_jumps=False, no_ties=False, all_pay=False, range_list=[], game_cache=None):
     start_time = time.time()
 
     player_specifications = [
@@ -90,18 +92,26 @@ def do_custom_valuations(num_players=2, no_jumps=False, no_ties=False, all_pay=F
 
     valuations = len(range_list)
     run_first_price(no_jumps=no_jumps, no_ties=no_ties, all_pay=all_pay, player_specifications=player_specifications,
-                    num_players=num_players, valuations=valuations)
+                    num_players=num_players, valuations=valuations, game_cache=game_cache)
 
     logging.info("--- %s seconds ---" % (time.time() - start_time))
 
 
+def log_game_estimates(game):
+    logging.info("Predicted profiles: " + str(game.get_number_of_entries()))
+
+    _, file_size, runtime = game.get_nfg_estimates()
+    logging.info("Predicted NFG file size: %.1f MB" % (file_size / 2 ** 20))
+    logging.info("Predicted runtime: %.1f seconds" % runtime)
+
+
 def run_first_price(no_jumps, no_ties, all_pay, player_valuations=[], only_pure=True, num_players=2,
-                    specification_class=AuctionPlayerSpecification, player_specifications=None, valuations=0):
+                    specification_class=AuctionPlayerSpecification, player_specifications=None, valuations=0,
+                    eliminate_dominated=False, estimate_only=False, game_cache=None):
     if player_specifications is None:
         valuations = len(specification_class.player_valuations)
 
-    game_name = "num_players_" + str(num_players) + "_allpay_" + str(all_pay) + "_noties_" + str(
-        no_ties) + "_nojumps_" + str(no_jumps) + "_" + str(valuations) + "_valuations_auction"
+    game_name = get_game_name(num_players, all_pay, no_ties, no_jumps, valuations)
 
     if player_specifications is None:
         player_specifications = [
@@ -113,7 +123,23 @@ def run_first_price(no_jumps, no_ties, all_pay, player_valuations=[], only_pure=
                                                no_ties=no_ties)
 
     logging.info("Running: " + game_name)
-    another_sample_auction.calculate_equilibria(only_pure)
+    if eliminate_dominated:
+        elimination_log = another_sample_auction.eliminate_dominated_strategies()
+        for player_index, removed_strategy, dominating_strategy in elimination_log:
+            logging.info("Player " + str(player_index) + " -> Removed: " + str(removed_strategy) + " Dominated by: " +
+                         str(dominating_strategy))
+
+    if game_cache is not None and game_cache.has_equilibria(another_sample_auction, only_pure):
+        return game_cache.get_equilibria(another_sample_auction, only_pure)
+
+    log_game_estimates(another_sample_auction)
+    if estimate_only:
+        return
+
+    if game_cache is not None:
+        return game_cache.get_equilibria(another_sample_auction, only_pure)
+
+    return another_sample_auction.calculate_equilibria(only_pure)
 
 
 def do_gnuth_experiments():
@@ -141,13 +167,49 @@ def do_gnuth_experiments():
     player_specification = GnuthPlayerSpecification(player_valuations=player_valuations)
     opponent_specification = GnuthPlayerSpecification(player_valuations=opponent_valuations)
 
-    sample_auction = FirstPriceAuction(game_name=game_name, player_specification=player_specification,
-                                       opponent_specification=opponent_specification)
+    sample_auction = FirstPriceAuction(game_name=game_name,
+                                       player_specifications=[player_specification, opponent_specification])
 
+    log_game_estimates(sample_auction)
     sample_auction.calculate_equilibria()
     logging.info("--- %s seconds ---" % (time.time() - start_time))
 
 
+def do_large_gnuth_experiments():
+    # Too many strategies to enumerate: iterative solvers only work with bids per valuation.
+    player_valuations = range(50, 200 + 1)
+    opponent_valuations = range(50, 150 + 1)
+
+    game_name = str(len(player_valuations)) + "_strong_" + str(len(opponent_valuations)) + "_weak_auction"
+
+    start_time = time.time()
+    player_specification = GnuthPlayerSpecification(player_valuations=player_valuations)
+    opponent_specification = GnuthPlayerSpecification(player_valuations=opponent_valuations)
+
+    sample_auction = FirstPriceAuction(game_name=game_name,
+                                       player_specifications=[player_specification, opponent_specification])
+
+    logging.info("Running: " + game_name)
+    sample_auction.calculate_best_response_dynamics()
+    sample_auction.calculate_fictitious_play(max_iterations=100)
+    logging.info("--- %s seconds ---" % (time.time() - start_time))
+
+
+def do_sweep_experiments():
+    # Configurations of do_allpay_experiments and do_first_price_experiments, solved in parallel.
+    sweep_grid = {"num_players": [2, 3],
+                  "player_valuations": [range(0, 3), range(0, 5), range(0, 7)],
+                  "all_pay": [True, False],
+                  "no_ties": [True, False],
+                  "no_jumps": [False],
+                  "only_pure": [True]}
+
+    start_time = time.time()
+    run_sweep(get_sweep_configurations(sweep_grid), results_directory="sweep_results", memory_limit=2 ** 33,
+              game_cache=GameCache())
+    logging.info("--- %s seconds ---" % (time.time() - start_time))
+
+
 if __name__ == "__main__":
     # do_allpay_experiments()
     # do_first_price_experiments()
@@ -166,7 +228,8 @@ if __name__ == "__main__":
     # ThreePlayersFirsPriceTiesSpec.player_valuations = range(0, 8)
     # do_custom_valuations(specification_class=ThreePlayersFirsPriceTiesSpec, num_players=3)
     range_list = [(0, 0), (0, 0), (1, 1), (1, 2), (1, 3), (2, 4), (2, 5), (2, 6), (2, 7)]
-    do_custom_valuations(num_players=3, no_jumps=False, no_ties=False, all_pay=False, range_list=range_list)
+    do_custom_valuations(num_players=3, no_jumps=False, no_ties=False, all_pay=False, range_list=range_list,
+                         game_cache=GameCache())
 
     # Trello card: https://trello.com/c/7avj9H5M/12-all-pay-with-ties-and-3-bidders
     # do_custom_valuations(specification_class=FivePlayerSpecification, num_players=3, no_ties=False, all_pay=True)
@@ -1,7 +1,19 @@
+import io
+import json
 import logging
+import math
+import os
+import re
 import subprocess
+import tempfile
+import threading
+import time
+from fractions import Fraction
+from functools import reduce
 from string import Template
 
+import numpy as np
+
 
 # TODO: Set a value according to your system
 GAMBIT_DIR = "/Applications/Gambit.app/Contents/MacOS/"
@@ -15,6 +27,18 @@ GAMBIT_DIR = "/Applications/Gambit.app/Contents/MacOS/"
 ALL_EQUILIBRIA = "gambit-enumpoly"
 PURE_EQUILIBRIA = "gambit-enumpure"
 
+# Characters buffered before writing payoff lines, and profile indexes written per chunk of the ordering trailer.
+NFG_BUFFER_SIZE = 2 ** 22
+PROFILE_ORDERING_CHUNK = 2 ** 16
+
+# Seconds between checks for the timeout and the cancellation of a solver.
+SOLVER_POLL_INTERVAL = 0.1
+
+# Quoted strings, words and braces of an NFG file, and the outcomes of its outcome version.
+NFG_TOKEN_PATTERN = re.compile(r'\s*(?:"((?:[^"\\]|\\.)*)"|([^\s{}"]+)|([{}]))')
+NFG_OUTCOME_PATTERN = re.compile(r'\s*\{\s*"(?:[^"\\]|\\.)*"\s*([^{}"]*)\}')
+PAYOFF_SEPARATOR_PATTERN = re.compile(r'[\s,]+')
+
 
 def start_nfg_section(nfg_file):
     nfg_file.write("\n{")
@@ -24,10 +48,17 @@ def close_nfg_section(nfg_file):
     nfg_file.write("}")
 
 
-def register_profile_payoff(nfg_file, profile_name, payoffs):
+def get_profile_payoff_line(profile_name, payoffs):
     payoff_strings = [str(payoff) for payoff in payoffs]
-    payoff_line = '{ "' + profile_name + '" ' + ",".join(payoff_strings) + " }"
-    nfg_file.write(payoff_line + "\n")
+    return '{ "' + profile_name + '" ' + ",".join(payoff_strings) + " }\n"
+
+
+def get_payoff_vector_line(payoffs):
+    return " ".join([str(payoff) for payoff in payoffs]) + "\n"
+
+
+def register_profile_payoff(nfg_file, profile_name, payoffs):
+    nfg_file.write(get_profile_payoff_line(profile_name, payoffs))
 
 
 def write_profile_ordering(nfg_file, profile_ordering):
@@ -35,141 +66,656 @@ def write_profile_ordering(nfg_file, profile_ordering):
     nfg_file.write("\n" + profile_ordering)
 
 
-def start_nfg_file(game_description, strategies_catalogues):
+def write_profile_ordering_range(nfg_file, num_profiles):
+    """
+    Writes the ordering trailer "1 2 3 ... num_profiles" in chunks, without building it in memory.
+    """
+    nfg_file.write("\n")
+
+    for chunk_start in range(1, num_profiles + 1, PROFILE_ORDERING_CHUNK):
+        chunk_stop = min(chunk_start + PROFILE_ORDERING_CHUNK, num_profiles + 1)
+        separator = " " if chunk_start > 1 else ""
+        nfg_file.write(separator + " ".join(map(str, range(chunk_start, chunk_stop))))
+
+
+class NfgWriter(object):
+    """
+    Streams the payoff section of an NFG file. Payoff lines are buffered and written in large chunks, and the
+    profile ordering trailer is generated on close.
+
+    By default it writes Gambit's outcome version, with one named outcome per profile. With payoff_version, only the
+    payoff vectors are written, in Gambit's profile ordering.
+    """
+
+    def __init__(self, nfg_file, buffer_size=None, payoff_version=False, checkpoint_file=None, game_hash=None):
+        self.nfg_file = nfg_file
+        self.buffer_size = NFG_BUFFER_SIZE if buffer_size is None else buffer_size
+        self.payoff_version = payoff_version
+
+        # After every flush, the profiles on disk and the file offset are recorded here.
+        self.checkpoint_file = checkpoint_file
+        self.game_hash = game_hash
+
+        self.buffer = []
+        self.buffered_characters = 0
+        self.num_profiles = 0
+
+    def start(self):
+        if self.payoff_version:
+            self.nfg_file.write("\n\n")
+        else:
+            start_nfg_section(self.nfg_file)
+
+        self.flush()
+
+    def resume(self, num_profiles, file_offset):
+        """
+        Continues a file interrupted after a checkpoint, discarding anything written after it.
+        """
+        self.nfg_file.seek(file_offset)
+        self.nfg_file.truncate()
+        self.num_profiles = num_profiles
+
+    def get_payoff_line(self, profile_name, payoffs):
+        if self.payoff_version:
+            return get_payoff_vector_line(payoffs)
+
+        return get_profile_payoff_line(profile_name, payoffs)
+
+    def register_profile_payoff(self, profile_name, payoffs):
+        self.write_lines([self.get_payoff_line(profile_name, payoffs)])
+
+    def write_lines(self, payoff_lines):
+        for payoff_line in payoff_lines:
+            self.buffer.append(payoff_line)
+            self.buffered_characters += len(payoff_line)
+
+        self.num_profiles += len(payoff_lines)
+        if self.buffered_characters >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        self.nfg_file.write("".join(self.buffer))
+        self.buffer = []
+        self.buffered_characters = 0
+
+        if self.checkpoint_file is not None:
+            self.nfg_file.flush()
+            write_checkpoint(self.checkpoint_file, self.game_hash, self.num_profiles, self.nfg_file.tell())
+
+    def close(self):
+        self.flush()
+
+        if not self.payoff_version:
+            close_nfg_section(self.nfg_file)
+            write_profile_ordering_range(self.nfg_file, self.num_profiles)
+
+        if self.checkpoint_file is not None and os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
+
+
+class NfgReader(object):
+    """
+    Reads an NFG file chunk by chunk, either in the outcome version or in the payoff version. Payoffs are returned
+    as integer numerators over a common denominator, with one row per profile in Gambit's ordering.
+    """
+
+    def __init__(self, nfg_file, chunk_size=None):
+        self.nfg_file = nfg_file
+        self.chunk_size = NFG_BUFFER_SIZE if chunk_size is None else chunk_size
+
+        self.buffer = ""
+        self.position = 0
+        self.at_end = False
+
+        self.payoff_blocks = []
+        self.denominator = 1
+
+    def read_chunk(self):
+        """
+        Appends the next chunk to the unread part of the buffer.
+        :return: False if the end of the file was reached.
+        """
+        chunk = self.nfg_file.read(self.chunk_size) if not self.at_end else ""
+        self.at_end = chunk == ""
+
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return not self.at_end
+
+    def get_tokens(self):
+        """
+        Yields the tokens after the current position: the token, whether it was quoted, and the position after it.
+        """
+        position = self.position
+        token_match = NFG_TOKEN_PATTERN.match(self.buffer, position)
+
+        while token_match is not None:
+            quoted_token, word, brace = token_match.groups()
+            if quoted_token is not None:
+                yield quoted_token.replace('\\"', '"').replace("\\\\", "\\"), True, token_match.end()
+            else:
+                yield word if word is not None else brace, False, token_match.end()
+
+            token_match = NFG_TOKEN_PATTERN.match(self.buffer, token_match.end())
+
+    @staticmethod
+    def get_quoted_list(tokens):
+        """
+        :return: Quoted tokens until the closing brace, which is consumed.
+        """
+        quoted_tokens = []
+        token, is_quoted, _ = next(tokens)
+        while is_quoted or token != "}":
+            quoted_tokens.append(token)
+            token, is_quoted, _ = next(tokens)
+
+        return quoted_tokens
+
+    def parse_header(self):
+        """
+        :return: Game description and strategy catalogues, or None if the buffer doesn't contain the whole header.
+        """
+        tokens = self.get_tokens()
+        try:
+            magic_token, _, magic_end = next(tokens)
+            if magic_end == len(self.buffer) and not self.at_end:
+                # The first token may continue in the next chunk.
+                return None
+            if magic_token != "NFG":
+                raise ValueError("This is not an NFG file")
+
+            next(tokens)
+            next(tokens)
+            game_description, _, _ = next(tokens)
+
+            next(tokens)
+            self.get_quoted_list(tokens)
+
+            next(tokens)
+            token, is_quoted, body_position = next(tokens)
+            strategy_catalogues = []
+            if token == "{" and not is_quoted:
+                while token == "{":
+                    strategy_catalogues.append(self.get_quoted_list(tokens))
+                    token, _, body_position = next(tokens)
+            else:
+                # Only the number of strategies is given.
+                while token != "}":
+                    strategy_catalogues.append([str(strategy + 1) for strategy in range(int(token))])
+                    token, _, body_position = next(tokens)
+
+            next_token = next(tokens, None)
+            if next_token is None and not self.at_end:
+                return None
+            if next_token is not None and next_token[1]:
+                # The optional comment.
+                body_position = next_token[2]
+
+        except StopIteration:
+            return None
+
+        self.position = body_position
+        return game_description, strategy_catalogues
+
+    def add_payoffs(self, payoff_tokens):
+        if len(payoff_tokens) == 0:
+            return
+
+        try:
+            numerators = np.array(payoff_tokens).astype(np.int64)
+            denominators = None
+        except (ValueError, OverflowError):
+            numerators, denominators = get_payoff_fractions(payoff_tokens)
+
+        if denominators is not None:
+            common_denominator = math.lcm(self.denominator, *np.unique(denominators).tolist())
+            if common_denominator != self.denominator:
+                self.payoff_blocks = [multiply_payoffs(payoff_block, common_denominator // self.denominator) for
+                                      payoff_block in self.payoff_blocks]
+                self.denominator = common_denominator
+
+            numerators = multiply_payoffs(numerators, self.denominator // denominators.astype(object))
+        elif self.denominator != 1:
+            numerators = multiply_payoffs(numerators, self.denominator)
+
+        self.payoff_blocks.append(numerators)
+
+    def get_words(self):
+        """
+        Yields the whitespace-separated words in the rest of the file, a chunk at a time. Words cut at the end of a
+        chunk are completed with the next one.
+        """
+        while True:
+            has_more = self.read_chunk()
+
+            word_stop = len(self.buffer)
+            if has_more:
+                word_stop = max(self.buffer.rfind(separator) for separator in " \n\r\t") + 1
+                if word_stop <= self.position:
+                    continue
+
+            words = self.buffer[self.position:word_stop].split()
+            self.position = word_stop
+            yield words
+
+            if not has_more:
+                return
+
+    def read_outcomes(self):
+        while True:
+            payoff_strings = []
+            outcome_match = NFG_OUTCOME_PATTERN.match(self.buffer, self.position)
+            while outcome_match is not None:
+                payoff_strings.append(outcome_match.group(1))
+                self.position = outcome_match.end()
+                outcome_match = NFG_OUTCOME_PATTERN.match(self.buffer, self.position)
+
+            self.add_payoffs([payoff_token for payoff_token in
+                              PAYOFF_SEPARATOR_PATTERN.split(",".join(payoff_strings)) if payoff_token])
+
+            unread_text = self.buffer[self.position:].lstrip()
+            if unread_text.startswith("}"):
+                self.position = len(self.buffer) - len(unread_text) + 1
+                return
+
+            if not self.read_chunk():
+                raise ValueError("The outcome section of the NFG file is incomplete")
+
+    def read(self):
+        """
+        :return: Game description, strategy catalogues, payoff numerators per profile, and their denominator.
+        """
+        header = self.parse_header()
+        while header is None:
+            if not self.read_chunk():
+                raise ValueError("The header of the NFG file is incomplete")
+            header = self.parse_header()
+
+        game_description, strategy_catalogues = header
+        num_players = len(strategy_catalogues)
+        num_profiles = reduce(lambda profiles, catalogue: profiles * len(catalogue), strategy_catalogues, 1)
+
+        while self.buffer[self.position:].strip() == "" and self.read_chunk():
+            pass
+        self.position += len(self.buffer[self.position:]) - len(self.buffer[self.position:].lstrip())
+
+        if self.buffer.startswith("{", self.position):
+            self.position += 1
+            self.read_outcomes()
+            outcome_table = self.get_payoff_table(num_players)
+
+            outcome_indexes = np.concatenate([np.array(words).astype(np.int64) for words in self.get_words()] +
+                                             [np.zeros(0, dtype=np.int64)])
+            if np.array_equal(outcome_indexes, np.arange(1, len(outcome_table) + 1)):
+                payoff_table = outcome_table
+            else:
+                # Outcome 0 is the null outcome, with zero payoffs.
+                outcome_table = np.concatenate([np.zeros((1, num_players), dtype=np.int64), outcome_table])
+                payoff_table = outcome_table[outcome_indexes]
+        else:
+            for payoff_tokens in self.get_words():
+                self.add_payoffs(payoff_tokens)
+            payoff_table = self.get_payoff_table(num_players)
+
+        if len(payoff_table) != num_profiles:
+            raise ValueError("The NFG file has payoffs for " + str(len(payoff_table)) + " profiles. Expected: " + str(
+                num_profiles))
+
+        return game_description, strategy_catalogues, payoff_table, self.denominator
+
+    def get_payoff_table(self, num_players):
+        payoff_table = np.concatenate(self.payoff_blocks + [np.zeros(0, dtype=np.int64)]).reshape(-1, num_players)
+        self.payoff_blocks = []
+        return payoff_table
+
+
+def get_payoff_fractions(payoff_tokens):
+    """
+    :return: Numerators and denominators of payoffs written as integers, fractions or decimals.
+    """
+    try:
+        numerator_tokens, _, denominator_tokens = np.char.partition(np.array(payoff_tokens), "/").T
+        denominator_tokens[denominator_tokens == ""] = "1"
+        return numerator_tokens.astype(np.int64), denominator_tokens.astype(np.int64)
+    except (ValueError, OverflowError):
+        payoffs = [Fraction(payoff_token) for payoff_token in payoff_tokens]
+        return (get_integer_array([payoff.numerator for payoff in payoffs]),
+                get_integer_array([payoff.denominator for payoff in payoffs]))
+
+
+def get_integer_array(values):
+    """
+    :return: An int64 array, or an array of Python integers if some value doesn't fit.
+    """
+    try:
+        return np.array(values, dtype=np.int64)
+    except OverflowError:
+        return np.array(values, dtype=object)
+
+
+def get_largest_magnitude(values):
+    values = np.asarray(values)
+    if values.size == 0:
+        return 0
+
+    return max(abs(int(values.min())), abs(int(values.max())))
+
+
+def multiply_payoffs(numerators, factors):
+    """
+    :return: Payoff numerators times the factors. They become Python integers if the product could overflow int64.
+    """
+    if get_largest_magnitude(numerators) * get_largest_magnitude(factors) > np.iinfo(np.int64).max:
+        return numerators.astype(object) * np.asarray(factors, dtype=object)
+
+    return numerators * np.asarray(factors).astype(numerators.dtype)
+
+
+def read_nfg_file(nfg_file_name, chunk_size=None):
+    """
+    :return: Game description, strategy catalogues, payoff numerators per profile, and their denominator.
+    """
+    with open(nfg_file_name) as nfg_file:
+        return NfgReader(nfg_file, chunk_size).read()
+
+
+def get_checkpoint_file(nfg_file_name):
+    return nfg_file_name + ".checkpoint"
+
+
+def write_checkpoint(checkpoint_file, game_hash, num_profiles, file_offset):
+    # Replacing the file in one step, so an interruption never leaves a partial checkpoint.
+    temporary_file = checkpoint_file + ".tmp"
+    with open(temporary_file, "w") as checkpoint:
+        json.dump({"game_hash": game_hash, "num_profiles": num_profiles, "file_offset": file_offset}, checkpoint)
+
+    os.replace(temporary_file, checkpoint_file)
+
+
+def read_checkpoint(checkpoint_file):
+    """
+    :return: Game hash, profiles written and file offset of the last checkpoint. None if there's no checkpoint.
+    """
+    if not os.path.exists(checkpoint_file):
+        return None
+
+    with open(checkpoint_file) as checkpoint:
+        checkpoint_data = json.load(checkpoint)
+
+    return checkpoint_data["game_hash"], checkpoint_data["num_profiles"], checkpoint_data["file_offset"]
+
+
+def get_nfg_header(game_description, strategies_catalogues):
     first_line = 'NFG 1 R "$game_desc" { $player_catalog }'
     first_line_template = Template(first_line)
 
     players = set(['"Player_' + str(player_number) + '"' for player_number in range(len(strategies_catalogues))])
     player_catalog = " ".join(players)
+
+    nfg_header = io.StringIO()
+    nfg_header.write(first_line_template.substitute({
+        'game_desc': game_description,
+        'player_catalog': player_catalog}))
+
+    start_nfg_section(nfg_header)
+
+    for strategy_catalogue in strategies_catalogues:
+        actions = " ".join(['"' + strategy + '"' for strategy in strategy_catalogue])
+        nfg_header.write("{ " + actions + " }\n")
+
+    close_nfg_section(nfg_header)
+
+    return nfg_header.getvalue()
+
+
+def get_nfg_file_name(game_description, nfg_directory=None):
     file_name = game_description + ".nfg"
+    return file_name if nfg_directory is None else os.path.join(nfg_directory, file_name)
 
-    with open(file_name, "w") as nfg_file:
-        nfg_file.write(first_line_template.substitute({
-            'game_desc': game_description,
-            'player_catalog': player_catalog}))
 
-        start_nfg_section(nfg_file)
+def write_nfg_header(nfg_file, game_description, strategies_catalogues):
+    nfg_file.write(get_nfg_header(game_description, strategies_catalogues))
+
 
-        for strategy_catalogue in strategies_catalogues:
-            actions = " ".join(['"' + strategy + '"' for strategy in strategy_catalogue])
-            nfg_file.write("{ " + actions + " }\n")
+def start_nfg_file(game_description, strategies_catalogues, nfg_directory=None):
+    file_name = get_nfg_file_name(game_description, nfg_directory)
 
-        close_nfg_section(nfg_file)
+    with open(file_name, "w") as nfg_file:
+        write_nfg_header(nfg_file, game_description, strategies_catalogues)
 
     return file_name
 
 
-def get_strategic_game_format(game_desc, strategies_catalogues, profile_payoffs):
+class TeeFile(object):
     """
-    Generates the content of a Gambit NFG file.
-    :return: Name of the generated file.
+    Writes to several text files at once, like the standard input of a solver and an NFG file kept on disk.
     """
 
-    template = 'NFG 1 R "$game_desc" { $player_catalog } \n\n ' \
-               '{ $actions_per_player \n}\n""\n\n' \
-               '{\n$payoff_per_profile\n}\n$profile_ordering'
+    def __init__(self, *target_files):
+        self.target_files = target_files
 
-    nfg_template = Template(template)
-    players = set(['"Player_' + str(player_number) + '"' for player_number in range(len(strategies_catalogues))])
+    def write(self, text):
+        for target_file in self.target_files:
+            target_file.write(text)
 
-    action_list = []
-    for strategies_catalog in strategies_catalogues:
-        actions = " ".join(['"' + strategy + '"' for strategy in strategies_catalog])
-        action_list.append("{ " + actions + " }")
+    def flush(self):
+        for target_file in self.target_files:
+            target_file.flush()
 
-    profile_lines = []
-    profile_ordering = []
 
-    for index, profile_info in enumerate(profile_payoffs):
-        profile_name, payoffs = profile_info
-        payoff_strings = [str(payoff) for payoff in payoffs]
-        payoff_line = '{ "' + profile_name + '" ' + ",".join(payoff_strings) + " }"
+def get_profile_ordering_size(num_profiles):
+    """
+    :return: Characters in the ordering trailer "1 2 3 ... num_profiles", including separators.
+    """
+    ordering_size = num_profiles
+    num_digits = 1
+    while 10 ** (num_digits - 1) <= num_profiles:
+        ordering_size += num_digits * (min(num_profiles, 10 ** num_digits - 1) - 10 ** (num_digits - 1) + 1)
+        num_digits += 1
 
-        profile_lines.append(payoff_line)
-        profile_ordering.append(str(index + 1))
+    return ordering_size
 
-    player_catalog = " ".join(players)
-    actions_per_player = "\n".join(action_list)
-    payoff_per_profile = "\n".join(profile_lines)
-    profile_ordering = " ".join(profile_ordering)
 
-    file_content = nfg_template.substitute({
-        'game_desc': game_desc,
-        'player_catalog': player_catalog,
-        'actions_per_player': actions_per_player,
-        'payoff_per_profile': payoff_per_profile,
-        'profile_ordering': profile_ordering})
+def get_equilibrium_profile(strategy_catalogues, probabilities):
+    """
+    Maps the probabilities of an equilibrium, listed player by player, to strategies.
+    :param strategy_catalogues: Catalog of available strategies.
+    :param probabilities: Probability strings, in the order of Gambit's solver output.
+    :return: Dictionary from (player index, strategy index) to probability.
+    """
+    player_index = 0
+    strategy_index = 0
 
-    file_name = game_desc + ".nfg"
-    with open(file_name, "w") as gambit_file:
-        gambit_file.write(file_content)
+    equilibrium_profile = {}
+    for probability in probabilities:
 
-    return file_name
+        strategies_catalog = strategy_catalogues[player_index]
+        strategy_name = strategies_catalog[strategy_index]
 
+        if float(probability) > 0.0:
+            logging.info(
+                "Player " + str(player_index) + "-> Strategy: " + str(
+                    strategy_name) + " \t\tProbability " + str(
+                    probability))
 
-def calculate_equilibrium(strategy_catalogues, gambit_file, tool=PURE_EQUILIBRIA):
-    """
-    Executes Gambit for equilibrium calculation.
-    :param tool: Gambit solver to use
-    :param strategy_catalogues: Catalog of available strategies.
-    :param gambit_file:
-    :return: List of equilibrium profiles.
-    """
+        equilibrium_profile[(player_index, strategy_index)] = probability
 
-    no_banner_option = "-q"
-    gambit_process = GAMBIT_DIR + tool
+        if strategy_index < len(strategies_catalog) - 1:
+            strategy_index += 1
+        else:
+            player_index += 1
+            strategy_index = 0
 
-    command_line = [gambit_process, no_banner_option, gambit_file]
-    logging.info("Starting equilibrium calculation using: " + gambit_process)
+    return equilibrium_profile
 
-    solver_process = subprocess.Popen(command_line, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    out, err = solver_process.communicate()
 
-    logging.info("Command-line output: Return Code " + str(solver_process.returncode))
-    if solver_process.returncode == 0:
-        logging.info("Command-line output: " + str(out))
+def get_equilibrium_support(strategy_catalogues, probabilities):
+    """
+    Maps the non-zero probabilities of an equilibrium, listed player by player, to strategies.
+    :param strategy_catalogues: Catalog of available strategies.
+    :param probabilities: Probability strings, in the order of Gambit's solver output.
+    :return: Dictionary from (player index, strategy index) to probability, only for strategies in the support.
+    """
+    equilibrium_support = {}
+    player_index = 0
+    player_offset = 0
+    for position, probability in enumerate(probabilities):
+        # Zero probabilities are written as "0", or with trailing decimals.
+        if probability.strip("0.") == "":
+            continue
 
-        nash_equilibrium_strings = str(out.decode()).splitlines()
-        if len(nash_equilibrium_strings) == 0:
-            logging.warning("NO EQUILIBRIA WAS FOUND FOR GAME " + gambit_file)
+        while position - player_offset >= len(strategy_catalogues[player_index]):
+            player_offset += len(strategy_catalogues[player_index])
+            player_index += 1
 
-        equilibrium_list = []
+        equilibrium_support[(player_index, position - player_offset)] = probability
 
-        start_index = 3
-        for index, nash_equilibrium in enumerate(nash_equilibrium_strings):
+    return equilibrium_support
 
-            logging.info("Equilibrium " + str(index + 1) + " of " + str(len(nash_equilibrium_strings)))
 
-            nash_equilibrium = nash_equilibrium.strip()
-            nash_equilibrium = nash_equilibrium[start_index:].split(",")
+def watch_solver(solver_process, timeout, cancel_event, finished_event, stop_reasons):
+    """
+    Kills the solver process when the timeout expires or the cancel event is set, unless it finishes before.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while not finished_event.wait(SOLVER_POLL_INTERVAL):
+        if deadline is not None and time.monotonic() > deadline:
+            stop_reasons.append("timeout")
+        elif cancel_event is not None and cancel_event.is_set():
+            stop_reasons.append("cancel")
+        else:
+            continue
+
+        solver_process.kill()
+        return
 
-            player_index = 0
-            strategy_index = 0
 
-            equilibrium_profile = {}
-            for probability in nash_equilibrium:
+def write_solver_input(solver_process, game_writer, writer_errors):
+    """
+    Writes the game to the standard input of the solver, and closes it so the solver can start.
+    """
+    try:
+        game_writer(solver_process.stdin)
+        solver_process.stdin.close()
+    except BrokenPipeError:
+        # The solver was stopped before reading the whole game.
+        pass
+    except Exception as writer_error:
+        writer_errors.append(writer_error)
+        solver_process.kill()
+
+
+def iterate_solver_output(gambit_file, tool=PURE_EQUILIBRIA, timeout=None, cancel_event=None, game_writer=None):
+    """
+    Executes Gambit for equilibrium calculation, and yields the equilibria as they are printed. The solver is
+    stopped when the timeout expires, when the cancel event is set, or when the generator is closed.
+    :param gambit_file: NFG file of the game. If game_writer is given, it only names the game in logs.
+    :param tool: Gambit solver to use.
+    :param timeout: Seconds before the solver is stopped. If expired, subprocess.TimeoutExpired is raised.
+    :param cancel_event: A threading.Event that stops the solver when set.
+    :param game_writer: Function that writes the NFG content to a file object. If given, the game is piped to the
+    standard input of the solver while it's being written, instead of read from gambit_file.
+    :return: Probability strings of each equilibrium, in the order of Gambit's solver output.
+    """
+    no_banner_option = "-q"
+    gambit_process = GAMBIT_DIR + tool
 
-                strategies_catalog = strategy_catalogues[player_index]
-                strategy_name = strategies_catalog[strategy_index]
+    command_line = [gambit_process, no_banner_option]
+    if game_writer is None:
+        command_line.append(gambit_file)
+    logging.info("Starting equilibrium calculation using: " + gambit_process)
 
-                if float(probability) > 0.0:
-                    logging.info(
-                        "Player " + str(player_index) + "-> Strategy: " + str(
-                            strategy_name) + " \t\tProbability " + str(
-                            probability))
+    start_index = 3
+    finished_event = threading.Event()
+    stop_reasons = []
+    writer_errors = []
+    with tempfile.TemporaryFile() as error_file:
+        solver_process = subprocess.Popen(command_line, stdout=subprocess.PIPE, stderr=error_file,
+                                          stdin=subprocess.PIPE if game_writer is not None else None,
+                                          universal_newlines=True)
+        watchdog = threading.Thread(target=watch_solver,
+                                    args=(solver_process, timeout, cancel_event, finished_event, stop_reasons),
+                                    daemon=True)
+        watchdog.start()
+
+        input_writer = None
+        if game_writer is not None:
+            input_writer = threading.Thread(target=write_solver_input,
+                                            args=(solver_process, game_writer, writer_errors), daemon=True)
+            input_writer.start()
+
+        try:
+            for nash_equilibrium in solver_process.stdout:
+                nash_equilibrium = nash_equilibrium.strip()
+                if nash_equilibrium.startswith("NE,"):
+                    yield nash_equilibrium[start_index:].split(",")
+                elif nash_equilibrium:
+                    logging.debug("Command-line output: " + nash_equilibrium)
+
+            solver_process.wait()
+            if input_writer is not None:
+                input_writer.join()
+        finally:
+            finished_event.set()
+            if solver_process.poll() is None:
+                solver_process.kill()
+                solver_process.wait()
+            solver_process.stdout.close()
+
+        logging.info("Command-line output: Return Code " + str(solver_process.returncode))
+        if len(writer_errors) > 0:
+            raise writer_errors[0]
+        if "timeout" in stop_reasons:
+            raise subprocess.TimeoutExpired(command_line, timeout)
+        if "cancel" in stop_reasons:
+            logging.warning("Equilibrium calculation cancelled for file " + gambit_file)
+            return
+
+        if solver_process.returncode != 0:
+            error_file.seek(0)
+            raise subprocess.CalledProcessError(solver_process.returncode, command_line, stderr=error_file.read())
+
+
+def iterate_equilibria(strategy_catalogues, gambit_file, tool=PURE_EQUILIBRIA, timeout=None, cancel_event=None,
+                       game_writer=None):
+    """
+    Executes Gambit for equilibrium calculation, and yields the equilibria as they are found. Parameters are the
+    same as in iterate_solver_output.
+    :return: Supports of the equilibrium profiles, as in get_equilibrium_support.
+    """
+    for index, probabilities in enumerate(iterate_solver_output(gambit_file, tool, timeout, cancel_event,
+                                                                game_writer)):
+        equilibrium_support = get_equilibrium_support(strategy_catalogues, probabilities)
+        logging.info("Equilibrium " + str(index + 1) + " found with " + str(len(equilibrium_support)) +
+                     " strategies in its support")
 
-                equilibrium_profile[(player_index, strategy_index)] = probability
+        yield equilibrium_support
 
-                if strategy_index < len(strategies_catalog) - 1:
-                    strategy_index += 1
-                else:
-                    player_index += 1
-                    strategy_index = 0
 
-            equilibrium_list.append(equilibrium_profile)
+def calculate_equilibrium(strategy_catalogues, gambit_file, tool=PURE_EQUILIBRIA, timeout=None, game_writer=None):
+    """
+    Executes Gambit for equilibrium calculation.
+    :param tool: Gambit solver to use
+    :param strategy_catalogues: Catalog of available strategies.
+    :param gambit_file:
+    :param timeout: Seconds before the solver is stopped. If expired, subprocess.TimeoutExpired is raised.
+    :param game_writer: Function that pipes the game to the solver, as in iterate_solver_output.
+    :return: List of equilibrium profiles.
+    """
+    equilibrium_list = []
+    try:
+        for index, nash_equilibrium in enumerate(iterate_solver_output(gambit_file, tool, timeout,
+                                                                       game_writer=game_writer)):
+            logging.info("Equilibrium " + str(index + 1))
 
-    else:
-        logging.error("ERROR WHILE PROCESSING FILE: " + gambit_file + " . Error: " + str(err))
+            equilibrium_profile = get_equilibrium_profile(strategy_catalogues, nash_equilibrium)
+            equilibrium_list.append(equilibrium_profile)
+    except subprocess.CalledProcessError as solver_error:
+        logging.error("ERROR WHILE PROCESSING FILE: " + gambit_file + " . Error: " + str(solver_error.stderr))
         return
 
+    if len(equilibrium_list) == 0:
+        logging.warning("NO EQUILIBRIA WAS FOUND FOR GAME " + gambit_file)
+
     return equilibrium_list
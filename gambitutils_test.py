@@ -0,0 +1,172 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from fractions import Fraction
+from unittest import mock
+
+import numpy as np
+
+import gambitutils
+
+
+class NfgWriterTest(unittest.TestCase):
+
+    def test_payoff_section(self):
+        nfg_file = io.StringIO()
+        nfg_writer = gambitutils.NfgWriter(nfg_file, buffer_size=10)
+
+        nfg_writer.start()
+        nfg_writer.register_profile_payoff("P0UP1L", [2, Fraction(1, 2)])
+        nfg_writer.register_profile_payoff("P0DP1L", [0, 1])
+        nfg_writer.register_profile_payoff("P0UP1R", [Fraction(-1, 3), 0])
+        nfg_writer.close()
+
+        expected_content = '\n{{ "P0UP1L" 2,1/2 }\n{ "P0DP1L" 0,1 }\n{ "P0UP1R" -1/3,0 }\n}\n1 2 3'
+        self.assertEqual(nfg_file.getvalue(), expected_content)
+        self.assertEqual(nfg_writer.num_profiles, 3)
+
+    def test_payoff_version(self):
+        nfg_file = io.StringIO()
+        nfg_writer = gambitutils.NfgWriter(nfg_file, payoff_version=True)
+
+        nfg_writer.start()
+        nfg_writer.register_profile_payoff("P0UP1L", [2, Fraction(1, 2)])
+        nfg_writer.register_profile_payoff("P0DP1L", [0, 1])
+        nfg_writer.close()
+
+        self.assertEqual(nfg_file.getvalue(), "\n\n2 1/2\n0 1\n")
+
+    def test_profile_ordering(self):
+        num_profiles = gambitutils.PROFILE_ORDERING_CHUNK * 2 + 5
+        nfg_file = io.StringIO()
+
+        gambitutils.write_profile_ordering_range(nfg_file, num_profiles)
+
+        expected_ordering = io.StringIO()
+        gambitutils.write_profile_ordering(expected_ordering, [str(index + 1) for index in range(num_profiles)])
+        self.assertEqual(nfg_file.getvalue(), expected_ordering.getvalue())
+
+    def test_profile_ordering_size(self):
+        for num_profiles in [1, 9, 10, 99, 100, 12345]:
+            nfg_file = io.StringIO()
+            gambitutils.write_profile_ordering_range(nfg_file, num_profiles)
+
+            self.assertEqual(gambitutils.get_profile_ordering_size(num_profiles), len(nfg_file.getvalue()))
+
+
+class NfgReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.outcome_content = 'NFG 1 R "A \\"game\\"" { "Player_0" "Player_1" }\n{{ "U" "D" }\n{ "L" "R" }\n}\n' \
+                               '"Comment"\n{{ "P0UP1L" 2,1/2 }\n{ "" -1/3 0 }\n}\n1 0 2 1'
+        self.payoff_content = 'NFG 1 R "A game" { "Player_0" "Player_1" } { 2 1 }\n\n2 1/2\n0 1\n'
+
+    def test_outcome_version(self):
+        nfg_reader = gambitutils.NfgReader(io.StringIO(self.outcome_content), chunk_size=5)
+
+        game_description, strategy_catalogues, payoff_table, denominator = nfg_reader.read()
+
+        self.assertEqual(game_description, 'A "game"')
+        self.assertEqual(strategy_catalogues, [["U", "D"], ["L", "R"]])
+        self.assertEqual(denominator, 6)
+        self.assertTrue(np.array_equal(payoff_table, [[12, 3], [0, 0], [-2, 0], [12, 3]]))
+
+    def test_payoff_version(self):
+        nfg_reader = gambitutils.NfgReader(io.StringIO(self.payoff_content), chunk_size=3)
+
+        game_description, strategy_catalogues, payoff_table, denominator = nfg_reader.read()
+
+        self.assertEqual(strategy_catalogues, [["1", "2"], ["1"]])
+        self.assertEqual(denominator, 2)
+        self.assertTrue(np.array_equal(payoff_table, [[4, 1], [0, 2]]))
+
+    def test_chunk_sizes(self):
+        for nfg_content in [self.outcome_content, self.payoff_content]:
+            game_description, strategy_catalogues, payoff_table, denominator = gambitutils.NfgReader(
+                io.StringIO(nfg_content)).read()
+
+            for chunk_size in range(1, len(nfg_content) + 2):
+                nfg_reader = gambitutils.NfgReader(io.StringIO(nfg_content), chunk_size=chunk_size)
+                actual_description, actual_catalogues, actual_table, actual_denominator = nfg_reader.read()
+
+                self.assertEqual(actual_description, game_description)
+                self.assertEqual(actual_catalogues, strategy_catalogues)
+                self.assertEqual(actual_denominator, denominator)
+                self.assertTrue(np.array_equal(actual_table, payoff_table))
+
+    def test_missing_payoffs(self):
+        nfg_content = 'NFG 1 R "A game" { "Player_0" "Player_1" } { 2 1 }\n\n2 1/2\n'
+        nfg_reader = gambitutils.NfgReader(io.StringIO(nfg_content))
+
+        self.assertRaises(ValueError, nfg_reader.read)
+
+    def test_large_denominators(self):
+        nfg_content = 'NFG 1 R "A game" { "Player_0" "Player_1" } { 2 1 }\n\n' + str(2 ** 62) + ' 1/3\n1/' + str(
+            2 ** 40) + ' 0\n'
+        nfg_reader = gambitutils.NfgReader(io.StringIO(nfg_content), chunk_size=5)
+
+        _, _, payoff_table, denominator = nfg_reader.read()
+
+        payoffs = [Fraction(int(numerator), denominator) for numerator in payoff_table.ravel()]
+        self.assertEqual(payoffs, [2 ** 62, Fraction(1, 3), Fraction(1, 2 ** 40), 0])
+
+    def test_truncated_outcomes(self):
+        nfg_content = 'NFG 1 R "A game" { "Player_0" "Player_1" } { 1 2 }\n{ { "First" 1, 2 }\n{ "Second" 3, 4 }'
+        nfg_reader = gambitutils.NfgReader(io.StringIO(nfg_content), chunk_size=4)
+
+        self.assertRaises(ValueError, nfg_reader.read)
+
+
+class SolverOutputTest(unittest.TestCase):
+
+    def setUp(self):
+        self.strategy_catalogues = [["U", "D"], ["L", "C", "R"]]
+        self.solver_directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.solver_directory.cleanup()
+
+    def get_solver_script(self, script_content):
+        # Python, started with -q like Gambit solvers, stands in for them.
+        solver_script = os.path.join(self.solver_directory.name, "solver.py")
+        with open(solver_script, "w") as solver_file:
+            solver_file.write(script_content)
+
+        return solver_script
+
+    def test_equilibrium_support(self):
+        equilibrium_support = gambitutils.get_equilibrium_support(self.strategy_catalogues,
+                                                                  ["0", "1", "0.000000", "0.500000", "1/2"])
+
+        self.assertEqual(equilibrium_support, {(0, 1): "1", (1, 1): "0.500000", (1, 2): "1/2"})
+
+    @mock.patch("gambitutils.GAMBIT_DIR", "")
+    def test_iterate_equilibria(self):
+        solver_script = self.get_solver_script('print("NE,1,0,0,0,1")\nprint("NE,0,1,1,0,0")\n')
+
+        equilibria = list(gambitutils.iterate_equilibria(self.strategy_catalogues, solver_script,
+                                                         tool=sys.executable))
+        self.assertEqual(equilibria, [{(0, 0): "1", (1, 2): "1"}, {(0, 1): "1", (1, 0): "1"}])
+
+        equilibrium_list = gambitutils.calculate_equilibrium(self.strategy_catalogues, solver_script,
+                                                             tool=sys.executable)
+        self.assertEqual(equilibrium_list[0], {(0, 0): "1", (0, 1): "0", (1, 0): "0", (1, 1): "0", (1, 2): "1"})
+
+    @mock.patch("gambitutils.GAMBIT_DIR", "")
+    def test_solver_timeout(self):
+        solver_script = self.get_solver_script('import time\nprint("NE,1,0,0,0,1", flush=True)\ntime.sleep(30)\n')
+
+        equilibria = gambitutils.iterate_equilibria(self.strategy_catalogues, solver_script, tool=sys.executable,
+                                                    timeout=0.5)
+        self.assertEqual(next(equilibria), {(0, 0): "1", (1, 2): "1"})
+        self.assertRaises(subprocess.TimeoutExpired, next, equilibria)
+
+    @mock.patch("gambitutils.GAMBIT_DIR", "")
+    def test_solver_error(self):
+        solver_script = self.get_solver_script('import sys\nsys.exit("Invalid game")\n')
+
+        self.assertIsNone(gambitutils.calculate_equilibrium(self.strategy_catalogues, solver_script,
+                                                            tool=sys.executable))
@@ -1,12 +1,23 @@
+import copy
+import hashlib
 import itertools
+import json
 import operator
 import logging
+import math
+import multiprocessing
+import os
+import time
+from fractions import Fraction
 from functools import reduce
 from abc import ABC, abstractmethod
+import numpy as np
 from tqdm import tqdm
 
 import gambitutils
 
+PROFILE_BLOCK_SIZE = 4096
+
 
 class PlayerSpecification(object):
 
@@ -14,8 +25,15 @@ class PlayerSpecification(object):
         self.player_types = player_types
         self.player_actions = player_actions
         self.strategy_catalogue = None
+        self.strategy_indexes = None
+        self.restricted = False
+
+        self.type_indexes = {player_type: type_index for type_index, player_type in enumerate(player_types)}
+        self.action_indexes = {player_action: action_index for action_index, player_action in
+                               enumerate(player_actions)}
 
-        self.pure_strategies = self.initialize_pure_strategies()
+        # Strategies are only enumerated when needed, since catalogues can be too large to build.
+        self.pure_strategies = None
 
     def initialize_pure_strategies(self):
         return itertools.product(self.player_actions, repeat=len(self.player_types))
@@ -24,15 +42,46 @@ class PlayerSpecification(object):
         return pow(len(self.player_actions), len(self.player_types))
 
     def get_pure_strategies(self):
+        if self.pure_strategies is None:
+            self.pure_strategies = self.initialize_pure_strategies()
+
         return self.pure_strategies
 
     def get_strategy_catalogue(self):
         if self.strategy_catalogue is None:
             self.strategy_catalogue = list(self.get_pure_strategies())
+            self.strategy_indexes = {player_strategy: strategy_index for strategy_index, player_strategy in
+                                     enumerate(self.strategy_catalogue)}
             logging.info("Pure strategies obtained: " + str(len(self.strategy_catalogue)))
 
         return self.strategy_catalogue
 
+    def set_strategy_catalogue(self, strategy_catalogue):
+        self.strategy_catalogue = list(strategy_catalogue)
+        self.strategy_indexes = {player_strategy: strategy_index for strategy_index, player_strategy in
+                                 enumerate(self.strategy_catalogue)}
+        self.pure_strategies = iter(self.strategy_catalogue)
+        self.restricted = True
+
+    def restrict_strategies(self, strategy_catalogue):
+        """
+        :return: A copy of this specification, whose catalogue only contains the strategies provided.
+        """
+        restricted_specification = copy.copy(self)
+        restricted_specification.set_strategy_catalogue(strategy_catalogue)
+        return restricted_specification
+
+    def __getstate__(self):
+        # Strategy generators can't be pickled, so worker processes receive the catalogue instead.
+        self.get_strategy_catalogue()
+        state = self.__dict__.copy()
+        state["pure_strategies"] = None
+        return state
+
+    def __setstate__(self, state):
+        state["pure_strategies"] = iter(state["strategy_catalogue"])
+        self.__dict__.update(state)
+
     def get_strategy_description(self, strategy):
         strategy_description = ""
 
@@ -40,22 +89,589 @@ class PlayerSpecification(object):
             strategy_description += "Type_" + str(self.player_types[type_index]) + "_action_" + str(action) + "_"
         return strategy_description[:-1]
 
+    def get_definition(self):
+        """
+        :return: What determines this player's strategies, as JSON-compatible values.
+        """
+        definition = {"specification_class": type(self).__name__,
+                      "player_types": list(self.player_types),
+                      "player_actions": list(self.player_actions)}
+
+        if self.restricted:
+            definition["strategy_catalogue"] = [list(player_strategy) for player_strategy in
+                                                self.get_strategy_catalogue()]
+
+        return definition
+
     def get_type_index(self, player_type):
-        return self.player_types.index(player_type)
+        return self.type_indexes[player_type]
+
+    def get_num_positions(self):
+        return len(self.player_types)
+
+    def get_strategy_counts(self, player_strategy):
+        """
+        :return: Array of shape (strategy positions, actions), counting the action played at every position.
+        """
+        strategy_counts = np.zeros((self.get_num_positions(), len(self.player_actions)), dtype=np.int64)
+        for strategy_position, player_action in enumerate(player_strategy):
+            strategy_counts[strategy_position, self.get_action_index(player_action)] += 1
+
+        return strategy_counts
+
+    def get_strategy_value(self, interim_values, player_strategy):
+        return sum(interim_values[strategy_position, self.get_action_index(player_action)] for
+                   strategy_position, player_action in enumerate(player_strategy))
+
+    def get_best_strategy(self, interim_values):
+        """
+        Finds the strategy with the highest value, given the interim value of every action at every position. Ties
+        are broken in favour of the first action.
+        """
+        return tuple(self.player_actions[int(np.argmax(position_values))] for position_values in interim_values)
+
+    def get_strategy_position(self, player_type):
+        """
+        :return: Position, within a strategy, of the action played by a type. None if the type doesn't act.
+        """
+        return self.get_type_index(player_type)
 
     def get_action_index(self, player_action):
-        return self.player_actions.index(player_action)
+        return self.action_indexes[player_action]
 
     def get_strategy_index(self, player_strategy):
-        return self.strategy_catalogue.index(player_strategy)
+        self.get_strategy_catalogue()
+        return self.strategy_indexes[tuple(player_strategy)]
 
 
-class BayesianGame(ABC):
+class StrategicGame(ABC):
+    """
+    A game in strategic form: players, their pure strategies and a payoff per player for every profile. Payoff
+    tables, NFG files and equilibria only need get_expected_utility_numerators, or a faster get_payoff_block.
+    """
 
     def __init__(self, game_name, player_specifications):
         self.game_name = game_name
         self.player_specifications = player_specifications
         self.num_players = len(player_specifications)
+        self.symmetric_payoffs = None
+
+        # NFG files are written here. By default, in the working directory.
+        self.nfg_directory = None
+
+    def set_player_specifications(self, player_specifications):
+        self.player_specifications = player_specifications
+        self.symmetric_payoffs = None
+
+    def get_strategy_catalogues(self):
+        strategies_catalogues = [player_specification.get_strategy_catalogue() for player_specification in
+                                 self.player_specifications]
+
+        return strategies_catalogues
+
+    def get_strategy_descriptions(self):
+        return [[player_specification.get_strategy_description(player_strategy) for player_strategy in strategy_list]
+                for strategy_list, player_specification in zip(self.get_strategy_catalogues(),
+                                                               self.player_specifications)]
+
+    def get_number_of_entries(self):
+
+        num_strategies = [len(player_specification.get_strategy_catalogue()) if player_specification.restricted
+                          else player_specification.get_num_strategies() for player_specification in
+                          self.player_specifications]
+        num_strategies = [player_strategies for player_strategies in num_strategies if player_strategies]
+
+        if len(num_strategies) > 0:
+            return reduce(operator.mul, num_strategies)
+
+    @abstractmethod
+    def get_expected_utility_numerators(self, strategy_profile):
+        """
+        :return: Payoff numerators of a strategy profile, over get_payoff_denominator(), one per player.
+        """
+        pass
+
+    def get_strategies_per_player(self):
+        return [len(strategy_catalogue) for strategy_catalogue in self.get_strategy_catalogues()]
+
+    def get_profile_indexes(self, start, stop):
+        """
+        Maps a range of profile positions, in Gambit's ordering, to strategy indexes.
+        :return: Array with one row per profile, and one strategy index per player.
+        """
+        strategy_indexes = np.unravel_index(np.arange(start, stop), self.get_strategies_per_player(), order="F")
+        return np.stack(strategy_indexes, axis=1)
+
+    def get_payoff_denominator(self):
+        return 1
+
+    def get_payoff_block(self, profile_indexes):
+        """
+        Obtains the expected utility numerators, over get_payoff_denominator(), for a block of strategy profiles.
+        Subclasses can override it with a vectorized implementation.
+        :param profile_indexes: Array with one row of strategy indexes per profile.
+        :return: Array with one row of payoff numerators per profile.
+        """
+        player_strategies = self.get_strategy_catalogues()
+        payoff_block = np.empty((len(profile_indexes), self.num_players), dtype=object)
+
+        for row, strategy_indexes in enumerate(profile_indexes):
+            profile = tuple(strategy_list[strategy_index] for strategy_list, strategy_index in
+                            zip(player_strategies, strategy_indexes))
+            payoff_block[row, :] = self.get_expected_utility_numerators(profile)
+
+        return payoff_block
+
+    def is_symmetric(self):
+        """
+        A game is symmetric if all players share the same strategies and permuting a profile permutes its payoffs.
+        Subclasses that can guarantee it should override this method.
+        """
+        return False
+
+    def get_multiset_ranks(self, sorted_indexes):
+        """
+        Ranks non-decreasing strategy index tuples with the combinatorial number system for multisets.
+        :return: Array with one rank per row, from 0 to the number of multisets minus one.
+        """
+        binomials = np.array([[math.comb(strategy_index + position, position + 1) for position in
+                               range(self.num_players)] for strategy_index in
+                              range(self.get_strategies_per_player()[0])], dtype=np.int64)
+
+        return sum(binomials[sorted_indexes[:, position], position] for position in range(self.num_players))
+
+    def get_symmetric_payoffs(self):
+        """
+        Computes the payoffs of sorted strategy profiles only, about |S|^N / N! of them, and caches them.
+        :return: Array with one row of payoff numerators per multiset rank.
+        """
+        if self.symmetric_payoffs is None:
+            num_strategies = self.get_strategies_per_player()[0]
+            num_multisets = math.comb(num_strategies + self.num_players - 1, self.num_players)
+            logging.info("Symmetric game: computing payoffs for " + str(num_multisets) + " sorted profiles ...")
+
+            sorted_profiles = itertools.combinations_with_replacement(range(num_strategies), self.num_players)
+            symmetric_payoffs = None
+            with tqdm(total=num_multisets) as progress_bar:
+                while True:
+                    sorted_indexes = np.array(list(itertools.islice(sorted_profiles, PROFILE_BLOCK_SIZE)),
+                                              dtype=np.int64)
+                    if len(sorted_indexes) == 0:
+                        break
+
+                    payoff_block = self.get_payoff_block(sorted_indexes)
+                    if symmetric_payoffs is None:
+                        symmetric_payoffs = np.empty((num_multisets, self.num_players), dtype=payoff_block.dtype)
+
+                    symmetric_payoffs[self.get_multiset_ranks(sorted_indexes)] = payoff_block
+                    progress_bar.update(len(sorted_indexes))
+
+            self.symmetric_payoffs = symmetric_payoffs
+
+        return self.symmetric_payoffs
+
+    def get_profile_payoffs(self, profile_indexes):
+        """
+        Obtains payoff numerators for a block of profiles. On symmetric games, they are looked up from the payoffs of
+        the sorted profile and permuted back.
+        """
+        if not self.is_symmetric():
+            return self.get_payoff_block(profile_indexes)
+
+        player_order = np.argsort(profile_indexes, axis=1, kind="stable")
+        sorted_indexes = np.take_along_axis(profile_indexes, player_order, axis=1)
+        sorted_payoffs = self.get_symmetric_payoffs()[self.get_multiset_ranks(sorted_indexes)]
+
+        profile_payoffs = np.empty_like(sorted_payoffs)
+        np.put_along_axis(profile_payoffs, player_order, sorted_payoffs, axis=1)
+        return profile_payoffs
+
+    def get_payoff_tensor(self):
+        """
+        Builds the payoff tensor of the normal-form game.
+        :return: Array indexed by the strategy index of each player, plus a last axis for the player payoffs.
+        """
+        strategies_per_player = self.get_strategies_per_player()
+        cell_entries = reduce(operator.mul, strategies_per_player)
+
+        payoff_block = self.get_profile_payoffs(self.get_profile_indexes(0, cell_entries))
+        return payoff_block.reshape(strategies_per_player + [self.num_players], order="F")
+
+    def save_payoff_tensor(self, file_prefix=None):
+        """
+        Saves the payoff table, one row per profile in Gambit's ordering, as a .npy file that can be memory-mapped.
+        A JSON header stores the strategy catalogues and the payoff denominator. See PayoffTensorGame.from_file.
+        :return: Names of the tensor and header files.
+        """
+        file_prefix = self.game_name if file_prefix is None else file_prefix
+        tensor_file = file_prefix + ".npy"
+        header_file = file_prefix + ".json"
+
+        player_strategies = self.get_strategy_catalogues()
+        strategy_catalogues = self.get_strategy_descriptions()
+        profile_entries = reduce(operator.mul, [len(strategy_list) for strategy_list in player_strategies])
+
+        logging.info("Saving the payoffs of " + str(profile_entries) + " profiles to " + tensor_file)
+        payoff_table = None
+        for block_start in tqdm(range(0, profile_entries, PROFILE_BLOCK_SIZE)):
+            block_stop = min(block_start + PROFILE_BLOCK_SIZE, profile_entries)
+            payoff_block = self.get_profile_payoffs(self.get_profile_indexes(block_start, block_stop))
+            block_dtype = get_numeric_dtype(payoff_block)
+
+            if payoff_table is None:
+                payoff_table = np.lib.format.open_memmap(tensor_file, mode="w+", dtype=block_dtype,
+                                                         shape=(profile_entries, self.num_players))
+            elif not np.can_cast(block_dtype, payoff_table.dtype, casting="safe"):
+                # The type comes from the first block. Payoffs are never truncated to fit it.
+                table_dtype = payoff_table.dtype
+                del payoff_table
+                os.remove(tensor_file)
+                raise ValueError("Payoffs of type " + str(block_dtype) + " from profile " + str(block_start) +
+                                 " can't be stored in a tensor of type " + str(table_dtype))
+
+            payoff_table[block_start:block_stop] = payoff_block
+
+        payoff_table.flush()
+        del payoff_table
+
+        tensor_header = {"game_name": self.game_name,
+                         "denominator": self.get_payoff_denominator(),
+                         "players": [{"player_types": list(player_specification.player_types),
+                                      "player_actions": list(player_specification.player_actions),
+                                      "strategies": [list(player_strategy) for player_strategy in strategy_list],
+                                      "strategy_descriptions": strategy_descriptions}
+                                     for player_specification, strategy_list, strategy_descriptions in
+                                     zip(self.player_specifications, player_strategies, strategy_catalogues)]}
+        with open(header_file, "w") as header:
+            json.dump(tensor_header, header, default=str)
+
+        return tensor_file, header_file
+
+    def get_payoffs(self, payoff_numerators):
+        denominator = self.get_payoff_denominator()
+        if denominator == 1:
+            return list(payoff_numerators)
+
+        return [Fraction(int(numerator), denominator) for numerator in payoff_numerators]
+
+    def get_payoff_lines(self, block_start, block_stop, strategy_catalogues, payoff_version=False):
+        """
+        Formats the NFG payoff lines for a contiguous range of profiles, in Gambit's ordering.
+        :param strategy_catalogues: Strategy descriptions per player, used for profile names.
+        :return: List of payoff lines.
+        """
+        profile_indexes = self.get_profile_indexes(block_start, block_stop)
+        return self.format_payoff_lines(profile_indexes, self.get_profile_payoffs(profile_indexes), strategy_catalogues,
+                                        payoff_version)
+
+    def format_payoff_lines(self, profile_indexes, payoff_block, strategy_catalogues, payoff_version=False):
+        """
+        :param payoff_block: Payoff numerators, with one row per profile in profile_indexes.
+        :return: List of payoff lines.
+        """
+        payoff_lines = []
+        for strategy_indexes, payoff_numerators in zip(profile_indexes, payoff_block):
+            payoffs = self.get_payoffs(payoff_numerators)
+
+            if payoff_version:
+                payoff_lines.append(gambitutils.get_payoff_vector_line(payoffs))
+            else:
+                profile_name = ""
+                for player_index, strategy_index in enumerate(strategy_indexes):
+                    profile_name += "P" + str(player_index) + strategy_catalogues[player_index][strategy_index]
+
+                logging.debug("Profile: " + profile_name + " Payoffs: " + str(payoffs))
+                payoff_lines.append(gambitutils.get_profile_payoff_line(profile_name, payoffs))
+
+        return payoff_lines
+
+    def iterate_payoff_lines(self, profile_entries, strategy_catalogues, payoff_version=False, workers=None,
+                             profile_start=0):
+        """
+        Yields blocks of payoff lines, in Gambit's ordering. With several workers, contiguous profile ranges are
+        computed in a process pool and merged back in order.
+        :param profile_start: Index of the first profile, for resumed runs.
+        """
+        block_ranges = [(block_start, min(block_start + PROFILE_BLOCK_SIZE, profile_entries)) for block_start in
+                        range(profile_start, profile_entries, PROFILE_BLOCK_SIZE)]
+
+        if self.is_symmetric():
+            # Computed once, before any worker process is started.
+            self.get_symmetric_payoffs()
+
+        if workers is None or workers <= 1:
+            for block_start, block_stop in block_ranges:
+                yield self.get_payoff_lines(block_start, block_stop, strategy_catalogues, payoff_version)
+        else:
+            logging.info("Computing payoffs using " + str(workers) + " worker processes")
+            with multiprocessing.Pool(processes=workers, initializer=initialize_payoff_worker,
+                                      initargs=(self, strategy_catalogues, payoff_version)) as worker_pool:
+                for payoff_lines in worker_pool.imap(get_worker_payoff_lines, block_ranges):
+                    yield payoff_lines
+
+    def get_nfg_estimates(self, payoff_version=False, sample_size=PROFILE_BLOCK_SIZE):
+        """
+        Predicts the size of the NFG file and the time to write it, by timing the payoffs and payoff lines of a sample
+        of profiles. Catalogues are built, but the payoff table isn't. On symmetric games, payoffs are timed over a
+        sample of sorted profiles and extrapolated to the number of multisets, since only those are computed.
+        :return: Number of profiles, file size in bytes and runtime in seconds.
+        """
+        start_time = time.time()
+        strategy_catalogues = self.get_strategy_descriptions()
+        setup_time = time.time() - start_time
+
+        profile_entries = reduce(operator.mul, [len(strategy_list) for strategy_list in strategy_catalogues])
+        sample_stop = min(sample_size, profile_entries)
+        profile_indexes = self.get_profile_indexes(0, sample_stop)
+
+        start_time = time.time()
+        payoff_block = self.get_payoff_block(profile_indexes)
+        payoff_time = (time.time() - start_time) * profile_entries / sample_stop
+
+        if self.is_symmetric():
+            num_strategies = self.get_strategies_per_player()[0]
+            num_multisets = math.comb(num_strategies + self.num_players - 1, self.num_players)
+            sorted_profiles = itertools.combinations_with_replacement(range(num_strategies), self.num_players)
+            sorted_indexes = np.array(list(itertools.islice(sorted_profiles, sample_size)), dtype=np.int64)
+
+            start_time = time.time()
+            self.get_payoff_block(sorted_indexes)
+            payoff_time = (time.time() - start_time) * num_multisets / len(sorted_indexes)
+
+        start_time = time.time()
+        payoff_lines = self.format_payoff_lines(profile_indexes, payoff_block, strategy_catalogues, payoff_version)
+        format_time = (time.time() - start_time) * profile_entries / sample_stop
+
+        file_size = len(gambitutils.get_nfg_header(self.game_name, strategy_catalogues))
+        file_size += sum(len(payoff_line) for payoff_line in payoff_lines) * profile_entries // sample_stop
+        if not payoff_version:
+            file_size += gambitutils.get_profile_ordering_size(profile_entries)
+
+        runtime = setup_time + payoff_time + format_time
+        return profile_entries, file_size, runtime
+
+    def get_game_parameters(self):
+        """
+        :return: Parameters that determine payoffs, besides the strategies. Used to validate checkpoints.
+        """
+        return {"game_class": type(self).__name__, "game_name": self.game_name}
+
+    def get_game_definition(self):
+        """
+        :return: Game parameters and player definitions, without the game name. Games with the same definition have
+        the same payoffs.
+        """
+        game_parameters = self.get_game_parameters()
+        game_parameters.pop("game_name")
+
+        return {"game_parameters": game_parameters,
+                "player_definitions": [player_specification.get_definition() for player_specification in
+                                       self.player_specifications]}
+
+    def get_game_hash(self, strategy_catalogues, payoff_version=False):
+        game_hash = hashlib.sha256()
+        game_hash.update(json.dumps(self.get_game_parameters(), sort_keys=True).encode())
+        game_hash.update(str(payoff_version).encode())
+
+        for strategy_catalogue in strategy_catalogues:
+            game_hash.update(("\n".join(strategy_catalogue) + "\n\n").encode())
+
+        return game_hash.hexdigest()
+
+    def get_resume_point(self, file_name, game_hash):
+        """
+        :return: Profiles already written and file offset to continue from. None if the file has to be started over.
+        """
+        checkpoint = gambitutils.read_checkpoint(gambitutils.get_checkpoint_file(file_name))
+        if checkpoint is None or not os.path.exists(file_name):
+            logging.info("No checkpoint found for " + file_name + ". Starting from scratch")
+            return None
+
+        checkpoint_hash, num_profiles, file_offset = checkpoint
+        if checkpoint_hash != game_hash:
+            logging.warning("The checkpoint of " + file_name + " belongs to a different game. Starting from scratch")
+            return None
+
+        logging.info("Resuming " + file_name + " after " + str(num_profiles) + " profiles")
+        return num_profiles, file_offset
+
+    def to_nfg_file(self, payoff_version=False, workers=None, resume=False):
+        """
+        Writes the normal-form game to a Gambit NFG file. Progress is checkpointed next to the file, so an
+        interrupted run can be resumed.
+        :param payoff_version: If True, writes only the payoff vectors instead of one named outcome per profile.
+        :param workers: Number of processes for payoff calculation. The output doesn't depend on it.
+        :param resume: If True, continues from the last checkpoint of a previous run of the same game.
+        :return: File name and strategy descriptions per player.
+        """
+        logging.info("Obtaining strategies for all players")
+        strategy_catalogues = self.get_strategy_descriptions()
+
+        file_name = gambitutils.get_nfg_file_name(self.game_name, self.nfg_directory)
+        game_hash = self.get_game_hash(strategy_catalogues, payoff_version)
+
+        resume_point = self.get_resume_point(file_name, game_hash) if resume else None
+        if resume_point is None:
+            file_name = gambitutils.start_nfg_file(self.game_name, strategy_catalogues, self.nfg_directory)
+            resume_point = (0, None)
+        profile_start, file_offset = resume_point
+
+        logging.info("File " + file_name + " created. Starting appending payoff values ...")
+        with open(file_name, "a" if file_offset is None else "r+") as nfg_file:
+            nfg_writer = gambitutils.NfgWriter(nfg_file, payoff_version=payoff_version,
+                                               checkpoint_file=gambitutils.get_checkpoint_file(file_name),
+                                               game_hash=game_hash)
+            if file_offset is None:
+                nfg_writer.start()
+            else:
+                nfg_writer.resume(profile_start, file_offset)
+
+            self.write_payoffs(nfg_writer, strategy_catalogues, payoff_version, workers, profile_start)
+
+        return file_name, strategy_catalogues
+
+    def write_nfg(self, nfg_file, strategy_catalogues, payoff_version=False, workers=None):
+        """
+        Writes the normal-form game to a text file object, like the standard input of a solver. There's no
+        checkpointing.
+        """
+        gambitutils.write_nfg_header(nfg_file, self.game_name, strategy_catalogues)
+
+        nfg_writer = gambitutils.NfgWriter(nfg_file, payoff_version=payoff_version)
+        nfg_writer.start()
+        self.write_payoffs(nfg_writer, strategy_catalogues, payoff_version, workers)
+
+    def write_payoffs(self, nfg_writer, strategy_catalogues, payoff_version, workers, profile_start=0):
+        """
+        Writes the payoffs of the profiles after profile_start, and closes the writer.
+        """
+        profile_entries = reduce(operator.mul, [len(strategy_catalogue) for strategy_catalogue in strategy_catalogues])
+        cell_entries = self.get_number_of_entries()
+        if cell_entries is None:
+            cell_entries = profile_entries
+
+        logging.info("Writing payoff values for " + str(cell_entries) + " entries ...")
+        with tqdm(total=cell_entries, initial=profile_start) as progress_bar:
+            for payoff_lines in self.iterate_payoff_lines(profile_entries, strategy_catalogues, payoff_version,
+                                                          workers, profile_start):
+                nfg_writer.write_lines(payoff_lines)
+                progress_bar.update(len(payoff_lines))
+
+            nfg_writer.close()
+
+        payoffs_obtained = nfg_writer.num_profiles
+        if payoffs_obtained != cell_entries:
+            raise Exception("The number of payoffs obtained doesn't match the estimate. Calculated: " + str(
+                payoffs_obtained) + " .Estimated: " + str(cell_entries))
+
+    def pipe_nfg(self, solver_input, strategy_catalogues, payoff_version=False, workers=None, keep_nfg_file=False):
+        """
+        Writes the normal-form game to the standard input of a solver.
+        :param keep_nfg_file: If True, the game is also written to its NFG file.
+        """
+        if not keep_nfg_file:
+            self.write_nfg(solver_input, strategy_catalogues, payoff_version, workers)
+            return
+
+        with open(gambitutils.get_nfg_file_name(self.game_name, self.nfg_directory), "w") as nfg_file:
+            self.write_nfg(gambitutils.TeeFile(solver_input, nfg_file), strategy_catalogues, payoff_version, workers)
+
+    def calculate_pure_equilibria(self):
+        """
+        Finds pure-strategy equilibria in-process, over the payoff tensor, without writing an NFG file.
+        :return: List of equilibrium profiles, with the same structure as gambitutils.calculate_equilibrium.
+        """
+        logging.info("Starting in-process pure equilibrium calculation ...")
+        strategy_catalogues = self.get_strategy_descriptions()
+        equilibria = get_pure_equilibria(self.get_payoff_tensor())
+
+        if len(equilibria) == 0:
+            logging.warning("NO EQUILIBRIA WAS FOUND FOR GAME " + self.game_name)
+
+        equilibrium_list = []
+        for index, strategy_indexes in enumerate(equilibria):
+            logging.info("Equilibrium " + str(index + 1) + " of " + str(len(equilibria)))
+
+            probabilities = ["1" if strategy_index == equilibrium_index else "0"
+                             for strategy_catalogue, equilibrium_index in zip(strategy_catalogues, strategy_indexes)
+                             for strategy_index in range(len(strategy_catalogue))]
+            equilibrium_list.append(gambitutils.get_equilibrium_profile(strategy_catalogues, probabilities))
+
+        return equilibrium_list
+
+    def calculate_equilibria(self, only_pure=True, payoff_version=False, workers=None, in_process=False,
+                             resume=False, timeout=None, pipe_game=False, keep_nfg_file=False):
+        """
+        Obtains the equilibria of the game.
+        :param in_process: If True, pure-strategy equilibria are found without Gambit.
+        :param resume: If True, NFG generation continues from the checkpoint of an interrupted run.
+        :param timeout: Seconds before Gambit is stopped.
+        :param pipe_game: If True, the game is piped to Gambit while it's generated, instead of written to disk first.
+        :param keep_nfg_file: If True, a piped game is also written to its NFG file.
+        :return: List of equilibrium profiles.
+        """
+        if in_process:
+            if not only_pure:
+                raise ValueError("The in-process solver only supports pure-strategy equilibria")
+
+            return self.calculate_pure_equilibria()
+
+        nfg_file, strategy_catalogues, tool, game_writer = self.get_solver_input(only_pure, payoff_version, workers,
+                                                                                 resume, pipe_game, keep_nfg_file)
+        return gambitutils.calculate_equilibrium(gambit_file=nfg_file,
+                                                 strategy_catalogues=strategy_catalogues,
+                                                 tool=tool, timeout=timeout, game_writer=game_writer)
+
+    def iterate_equilibria(self, only_pure=True, payoff_version=False, workers=None, resume=False, timeout=None,
+                           cancel_event=None, pipe_game=False, keep_nfg_file=False):
+        """
+        Obtains the equilibria of the game with Gambit, as they are found. Closing the generator stops Gambit.
+        :param timeout: Seconds before Gambit is stopped.
+        :param cancel_event: A threading.Event that stops Gambit when set.
+        :return: Generator of equilibrium supports, as in gambitutils.get_equilibrium_support.
+        """
+        nfg_file, strategy_catalogues, tool, game_writer = self.get_solver_input(only_pure, payoff_version, workers,
+                                                                                 resume, pipe_game, keep_nfg_file)
+        return gambitutils.iterate_equilibria(strategy_catalogues=strategy_catalogues, gambit_file=nfg_file,
+                                              tool=tool, timeout=timeout, cancel_event=cancel_event,
+                                              game_writer=game_writer)
+
+    def get_solver_input(self, only_pure, payoff_version, workers, resume, pipe_game, keep_nfg_file):
+        """
+        :return: NFG file of the game, strategy descriptions per player, the Gambit solver to use and the function
+        that pipes the game to it, if any.
+        """
+        logging.info("Starting equilibrium calculation ...")
+
+        tool = gambitutils.PURE_EQUILIBRIA
+
+        if not only_pure:
+            tool = gambitutils.ALL_EQUILIBRIA
+
+        if pipe_game:
+            if resume:
+                raise ValueError("Piped games are not checkpointed, so they can't be resumed")
+
+            logging.info("Obtaining strategies for all players")
+            strategy_catalogues = self.get_strategy_descriptions()
+
+            def game_writer(solver_input):
+                self.pipe_nfg(solver_input, strategy_catalogues, payoff_version, workers, keep_nfg_file)
+
+            return gambitutils.get_nfg_file_name(self.game_name, self.nfg_directory), strategy_catalogues, tool, \
+                game_writer
+
+        nfg_file, strategy_catalogues = self.to_nfg_file(payoff_version=payoff_version, workers=workers,
+                                                         resume=resume)
+        logging.info("Gambit file generated at " + nfg_file)
+
+        return nfg_file, strategy_catalogues, tool, None
+
+
+class BayesianGame(StrategicGame):
+    """
+    Payoffs are expected utilities over the type profiles, from get_types_probability and get_utility.
+    """
 
     def get_expected_utilities(self, strategy_profile):
 
@@ -78,6 +694,13 @@ class BayesianGame(ABC):
 
         return expected_player_utilities
 
+    def get_expected_utility_numerators(self, strategy_profile):
+        """
+        Exact-integer mode: games with rational payoffs can override it to accumulate integer numerators over
+        get_payoff_denominator(), so rationals are only rebuilt when the payoffs are written.
+        """
+        return self.get_expected_utilities(strategy_profile)
+
     @abstractmethod
     def get_types_probability(self, player_types):
         pass
@@ -86,85 +709,408 @@ class BayesianGame(ABC):
     def get_utility(self, player_types, strategy_profile):
         pass
 
-    def get_strategy_catalogues(self):
-        strategies_catalogues = [player_specification.get_strategy_catalogue() for player_specification in
-                                 self.player_specifications]
+    def get_interim_utilities(self, player_index, opponent_indexes):
+        """
+        Obtains the interim utility of every action at every strategy position, against each opponent profile.
+        Subclasses can override it with a vectorized implementation.
+        :param opponent_indexes: Array with one row of strategy indexes per opponent profile. The column of
+        player_index is ignored.
+        :return: Array of shape (strategy positions, actions, opponent profiles).
+        """
+        player_specification = self.player_specifications[player_index]
+        player_strategies = self.get_strategy_catalogues()
+        num_positions = player_specification.get_num_positions()
 
-        return strategies_catalogues
+        interim_utilities = np.zeros((num_positions, len(player_specification.player_actions), len(opponent_indexes)),
+                                     dtype=object)
+        types_iterator = list(itertools.product(
+            *[player_specification.player_types for player_specification in self.player_specifications]))
 
-    def get_number_of_entries(self):
+        for opponent_row, strategy_indexes in enumerate(opponent_indexes):
+            strategy_profile = [strategy_list[strategy_index] for strategy_list, strategy_index in
+                                zip(player_strategies, strategy_indexes)]
 
-        num_strategies = [player_specification.get_num_strategies() for player_specification in
-                          self.player_specifications if player_specification.get_num_strategies()]
+            for action_index, player_action in enumerate(player_specification.player_actions):
+                strategy_profile[player_index] = tuple(player_action for _ in range(num_positions))
 
-        if len(num_strategies) > 0:
-            return reduce(operator.mul, num_strategies)
+                for player_types in types_iterator:
+                    strategy_position = player_specification.get_strategy_position(player_types[player_index])
+                    if strategy_position is None:
+                        continue
 
-    def to_nfg_file(self):
-        logging.info("Obtaining strategies for all players")
-        player_strategies = [player_specification.get_strategy_catalogue() for player_specification in
-                             self.player_specifications]
+                    utility = self.get_utility(player_types, tuple(strategy_profile))[player_index]
+                    interim_utilities[strategy_position, action_index, opponent_row] += self.get_types_probability(
+                        player_types) * utility
 
-        profile_ordering = []
+        return interim_utilities
 
-        strategy_catalogues = [
-            [player_specification.get_strategy_description(player_strategy) for player_strategy in strategy_list] for
-            strategy_list, player_specification in zip(player_strategies, self.player_specifications)]
+    def get_dominated_strategies(self, player_index, strategy_indexes, interim_utilities, weak=False):
+        """
+        Finds the strategies dominated by another one that only differs in the action of a single position. As
+        utilities separate by type, that happens when the action is dominated at that position.
+        :return: Dictionary from dominated strategy index to the index of a dominating strategy.
+        """
+        player_specification = self.player_specifications[player_index]
+        strategy_list = self.get_strategy_catalogues()[player_index]
 
-        file_name = gambitutils.start_nfg_file(self.game_name, strategy_catalogues)
+        dominated_strategies = {}
+        for strategy_position, position_utilities in enumerate(interim_utilities):
+            deviation_groups = {}
+            for strategy_index in strategy_indexes:
+                player_strategy = strategy_list[strategy_index]
+                deviation_key = player_strategy[:strategy_position] + player_strategy[strategy_position + 1:]
+                deviation_groups.setdefault(deviation_key, []).append(strategy_index)
 
-        cell_entries = self.get_number_of_entries()
-        if cell_entries is None:
-            cell_entries = reduce(operator.mul, [len(strategy_list) for strategy_list in player_strategies])
+            for deviation_group in deviation_groups.values():
+                for strategy_index, other_index in itertools.permutations(deviation_group, 2):
+                    if strategy_index in dominated_strategies:
+                        continue
 
-        logging.info("File " + file_name + " created. Starting appending payoff values ...")
-        logging.info("Writing payoff values for " + str(cell_entries) + " entries ...")
-        with tqdm(total=cell_entries) as progress_bar, open(file_name, "a") as nfg_file:
+                    action_utilities = position_utilities[
+                        player_specification.get_action_index(strategy_list[strategy_index][strategy_position])]
+                    other_utilities = position_utilities[
+                        player_specification.get_action_index(strategy_list[other_index][strategy_position])]
 
-            gambitutils.start_nfg_section(nfg_file)
+                    if weak:
+                        is_dominated = np.all(other_utilities >= action_utilities) and np.any(
+                            other_utilities > action_utilities)
+                    else:
+                        is_dominated = np.all(other_utilities > action_utilities)
 
-            # This is a hack to make the file match Gambit format
-            cell_iterator = itertools.product(*reversed(player_strategies))
-            for index, reversed_profile in enumerate(cell_iterator):
+                    if is_dominated:
+                        dominated_strategies[strategy_index] = other_index
 
-                profile = tuple(reversed(reversed_profile))
-                payoffs = self.get_expected_utilities(profile)
+        return dominated_strategies
 
-                profile_name = ""
+    def eliminate_dominated_strategies(self, weak=False):
+        """
+        Iterated elimination of dominated strategies, using per-type interim utilities. The game keeps the reduced
+        catalogues, so they are the ones written by to_nfg_file.
+        :param weak: If True, weakly dominated strategies are also removed. Unlike strict dominance, this can remove
+        equilibria.
+        :return: List of (player index, removed strategy, dominating strategy) tuples, in removal order.
+        """
+        player_strategies = self.get_strategy_catalogues()
+        surviving_indexes = [list(range(len(strategy_list))) for strategy_list in player_strategies]
+        elimination_log = []
 
-                for player_index in range(self.num_players):
-                    player_strategy = profile[player_index]
-                    strategy_catalogue = strategy_catalogues[player_index]
-                    strategy_list = player_strategies[player_index]
+        elimination_round = 0
+        strategies_removed = True
+        while strategies_removed:
+            strategies_removed = False
+            elimination_round += 1
 
-                    profile_name += "P" + str(player_index) + strategy_catalogue[strategy_list.index(player_strategy)]
+            for player_index in range(self.num_players):
+                opponent_indexes = [strategy_indexes if opponent_index != player_index else [0] for
+                                    opponent_index, strategy_indexes in enumerate(surviving_indexes)]
+                opponent_indexes = np.array(list(itertools.product(*opponent_indexes)), dtype=np.int64)
 
-                logging.debug("Profile: " + profile_name + " Payoffs: " + str(payoffs))
-                gambitutils.register_profile_payoff(nfg_file, profile_name, payoffs)
+                interim_utilities = self.get_interim_utilities(player_index, opponent_indexes)
+                dominated_strategies = self.get_dominated_strategies(player_index, surviving_indexes[player_index],
+                                                                     interim_utilities, weak)
 
-                profile_ordering.append(str(index + 1))
-                progress_bar.update(1)
+                for strategy_index, other_index in dominated_strategies.items():
+                    elimination_log.append((player_index, player_strategies[player_index][strategy_index],
+                                            player_strategies[player_index][other_index]))
 
-            gambitutils.close_nfg_section(nfg_file)
-            gambitutils.write_profile_ordering(nfg_file, profile_ordering)
+                if len(dominated_strategies) > 0:
+                    strategies_removed = True
+                    surviving_indexes[player_index] = [strategy_index for strategy_index in
+                                                       surviving_indexes[player_index]
+                                                       if strategy_index not in dominated_strategies]
+                    logging.info("Round " + str(elimination_round) + ": Player " + str(player_index) + " -> " + str(
+                        len(dominated_strategies)) + " dominated strategies removed. Remaining: " + str(
+                        len(surviving_indexes[player_index])))
 
-        payoffs_obtained = len(profile_ordering)
-        if payoffs_obtained != cell_entries:
-            raise Exception("The number of payoffs obtained doesn't match the estimate. Calculated: " + str(
-                payoffs_obtained) + " .Estimated: " + str(cell_entries))
+        self.set_player_specifications(
+            [player_specification.restrict_strategies([strategy_list[strategy_index] for strategy_index in
+                                                       strategy_indexes])
+             for player_specification, strategy_list, strategy_indexes in
+             zip(self.player_specifications, player_strategies, surviving_indexes)])
 
-        return file_name, strategy_catalogues
+        return elimination_log
 
-    def calculate_equilibria(self, only_pure=True):
-        logging.info("Starting equilibrium calculation ...")
-        nfg_file, strategy_catalogues = self.to_nfg_file()
-        logging.info("Gambit file generated at " + nfg_file)
+    def get_interim_values(self, player_index, strategy_counts):
+        """
+        Obtains the interim value of every action at every strategy position, against the opponents' (mixed)
+        strategies. Needed by the iterative solvers, which never build the full payoff table.
+        :param strategy_counts: Per player, action counts per strategy position, as in
+        PlayerSpecification.get_strategy_counts. Every position of a player adds up to the same total.
+        :return: Array of shape (strategy positions, actions), and the denominator that turns the value of a strategy
+        into its expected utility.
 
-        tool = gambitutils.PURE_EQUILIBRIA
+        This generic version goes through every type profile and every action profile, with get_types_probability and
+        get_utility. Strategies are built by repeating one action at every position, so get_utility must only use the
+        actions of the types in the profile. Games with a faster way should override it.
+        """
+        player_specification = self.player_specifications[player_index]
+        strategy_totals = [int(player_counts[0].sum()) for player_counts in strategy_counts]
 
-        if not only_pure:
-            tool = gambitutils.ALL_EQUILIBRIA
+        interim_values = [[Fraction(0) for _ in player_specification.player_actions] for _ in
+                          range(player_specification.get_num_positions())]
+        for player_types in itertools.product(*[specification.player_types for specification in
+                                                self.player_specifications]):
+            strategy_position = player_specification.get_strategy_position(player_types[player_index])
+            if strategy_position is None:
+                continue
 
-        return gambitutils.calculate_equilibrium(gambit_file=nfg_file,
-                                                 strategy_catalogues=strategy_catalogues,
-                                                 tool=tool)
+            probability = Fraction(self.get_types_probability(player_types))
+            if probability == 0:
+                continue
+
+            # Per opponent, the action of its type and how many of its strategies play it.
+            action_weights = []
+            for opponent_index, (opponent_specification, opponent_type) in enumerate(zip(self.player_specifications,
+                                                                                       player_types)):
+                if opponent_index == player_index:
+                    action_weights.append([(None, 1)])
+                    continue
+
+                opponent_position = opponent_specification.get_strategy_position(opponent_type)
+                if opponent_position is None:
+                    action_weights.append([(opponent_specification.player_actions[0], strategy_totals[opponent_index])])
+                else:
+                    action_weights.append([(opponent_action, int(action_count)) for opponent_action, action_count in
+                                           zip(opponent_specification.player_actions,
+                                               strategy_counts[opponent_index][opponent_position]) if action_count])
+
+            for action_index, player_action in enumerate(player_specification.player_actions):
+                for action_profile in itertools.product(*action_weights):
+                    strategy_profile = tuple(
+                        (player_action if player_index == profile_index else profile_action,) *
+                        self.player_specifications[profile_index].get_num_positions()
+                        for profile_index, (profile_action, _) in enumerate(action_profile))
+                    profile_weight = reduce(operator.mul, [action_weight for _, action_weight in action_profile])
+
+                    player_utility = Fraction(self.get_utility(player_types, strategy_profile)[player_index])
+                    interim_values[strategy_position][action_index] += probability * profile_weight * player_utility
+
+        value_multiple = 1
+        for position_values in interim_values:
+            for value in position_values:
+                value_multiple = math.lcm(value_multiple, value.denominator)
+
+        opponent_totals = [strategy_total for opponent_index, strategy_total in enumerate(strategy_totals) if
+                           opponent_index != player_index]
+        denominator = value_multiple * reduce(operator.mul, opponent_totals, 1)
+        return np.array([[int(value * value_multiple) for value in position_values] for position_values in
+                         interim_values], dtype=object), denominator
+
+    def get_best_response(self, player_index, strategy_counts):
+        """
+        :return: Best-response strategy, its expected utility, and the expected utility of the player's own counts.
+        """
+        player_specification = self.player_specifications[player_index]
+        interim_values, denominator = self.get_interim_values(player_index, strategy_counts)
+
+        best_strategy = player_specification.get_best_strategy(interim_values)
+        best_utility = Fraction(int(player_specification.get_strategy_value(interim_values, best_strategy)),
+                                denominator)
+
+        player_counts = strategy_counts[player_index]
+        current_utility = Fraction(int((player_counts * interim_values).sum()),
+                                   denominator * int(player_counts[0].sum()))
+
+        return best_strategy, best_utility, current_utility
+
+    def get_initial_profile(self):
+        return tuple(player_specification.get_best_strategy(
+            np.zeros((player_specification.get_num_positions(), len(player_specification.player_actions)),
+                     dtype=np.int64)) for player_specification in self.player_specifications)
+
+    def calculate_best_response_dynamics(self, initial_profile=None, max_iterations=100):
+        """
+        Players take turns switching to a best response, until nobody can improve. Strategies are represented by
+        their actions, so catalogues are never enumerated.
+        :return: A pure-strategy equilibrium, as a tuple of strategies. None if there's no convergence.
+        """
+        strategy_profile = list(initial_profile if initial_profile is not None else self.get_initial_profile())
+
+        for iteration in range(max_iterations):
+            strategy_switched = False
+
+            for player_index, player_specification in enumerate(self.player_specifications):
+                strategy_counts = [specification.get_strategy_counts(player_strategy) for
+                                   specification, player_strategy in
+                                   zip(self.player_specifications, strategy_profile)]
+                best_strategy, best_utility, current_utility = self.get_best_response(player_index, strategy_counts)
+
+                if best_utility > current_utility:
+                    logging.debug("Player " + str(player_index) + " switches to " + str(best_strategy))
+                    strategy_profile[player_index] = best_strategy
+                    strategy_switched = True
+
+            if not strategy_switched:
+                logging.info("Best-response dynamics converged after " + str(iteration + 1) + " iterations")
+                for player_index, player_strategy in enumerate(strategy_profile):
+                    logging.info("Player " + str(player_index) + "-> Strategy: " + str(player_strategy))
+
+                return tuple(strategy_profile)
+
+        logging.warning("Best-response dynamics didn't converge after " + str(max_iterations) + " iterations")
+
+    def calculate_fictitious_play(self, initial_profile=None, max_iterations=1000):
+        """
+        Every iteration, all players best-respond to the empirical frequency of their opponents' past strategies.
+        Only per-position action counts are kept, so catalogues are never enumerated.
+        :return: The empirical mixed strategy of each player, as a dictionary from strategy to probability.
+        """
+        strategy_profile = initial_profile if initial_profile is not None else self.get_initial_profile()
+
+        strategy_counts = [player_specification.get_strategy_counts(player_strategy) for
+                           player_specification, player_strategy in zip(self.player_specifications, strategy_profile)]
+        strategy_frequencies = [{player_strategy: 1} for player_strategy in strategy_profile]
+
+        for _ in tqdm(range(max_iterations)):
+            best_responses = [self.get_best_response(player_index, strategy_counts)[0] for player_index in
+                              range(self.num_players)]
+
+            for player_index, best_strategy in enumerate(best_responses):
+                strategy_counts[player_index] += self.player_specifications[player_index].get_strategy_counts(
+                    best_strategy)
+                player_frequencies = strategy_frequencies[player_index]
+                player_frequencies[best_strategy] = player_frequencies.get(best_strategy, 0) + 1
+
+        mixed_strategies = []
+        for player_index, player_frequencies in enumerate(strategy_frequencies):
+            _, best_utility, current_utility = self.get_best_response(player_index, strategy_counts)
+            logging.info("Player " + str(player_index) + "-> Strategies played: " + str(
+                len(player_frequencies)) + " Regret: " + str(float(best_utility - current_utility)))
+
+            num_strategies = sum(player_frequencies.values())
+            mixed_strategies.append({player_strategy: Fraction(frequency, num_strategies) for
+                                     player_strategy, frequency in player_frequencies.items()})
+
+        return mixed_strategies
+
+
+class PayoffTensorGame(StrategicGame):
+    """
+    A game saved with StrategicGame.save_payoff_tensor, or read from an NFG file. Payoffs are read from the
+    memory-mapped tensor file or from the payoff table, so analysis, equilibrium calculation and NFG export don't
+    recompute them. Types and utilities are not stored, so it's not a BayesianGame.
+    """
+
+    def __init__(self, game_name, player_specifications, strategy_catalogues, denominator, tensor_file=None,
+                 payoff_table=None):
+        super(PayoffTensorGame, self).__init__(game_name=game_name, player_specifications=player_specifications)
+
+        self.strategy_catalogues = strategy_catalogues
+        self.tensor_file = tensor_file
+        self.denominator = denominator
+        self.payoff_table = payoff_table if tensor_file is None else np.load(tensor_file, mmap_mode="r")
+
+    @classmethod
+    def from_file(cls, file_prefix):
+        with open(file_prefix + ".json") as header:
+            tensor_header = json.load(header)
+
+        player_specifications = []
+        for player_header in tensor_header["players"]:
+            player_specification = PlayerSpecification(player_types=player_header["player_types"],
+                                                       player_actions=player_header["player_actions"])
+            player_specification.set_strategy_catalogue([tuple(player_strategy) for player_strategy in
+                                                         player_header["strategies"]])
+            player_specifications.append(player_specification)
+
+        return cls(game_name=tensor_header["game_name"], player_specifications=player_specifications,
+                   strategy_catalogues=[player_header["strategy_descriptions"] for player_header in
+                                        tensor_header["players"]],
+                   tensor_file=file_prefix + ".npy", denominator=tensor_header["denominator"])
+
+    @classmethod
+    def from_nfg_file(cls, nfg_file_name, chunk_size=None):
+        """
+        Builds the game from an NFG file, in the outcome or the payoff version. Strategies are identified by their
+        names in the file.
+        """
+        game_description, strategy_catalogues, payoff_table, denominator = gambitutils.read_nfg_file(nfg_file_name,
+                                                                                                     chunk_size)
+
+        player_specifications = []
+        for strategy_catalogue in strategy_catalogues:
+            player_specification = PlayerSpecification(player_types=[], player_actions=[])
+            player_specification.set_strategy_catalogue([(strategy_name,) for strategy_name in strategy_catalogue])
+            player_specifications.append(player_specification)
+
+        return cls(game_name=game_description, player_specifications=player_specifications,
+                   strategy_catalogues=strategy_catalogues, denominator=denominator, payoff_table=payoff_table)
+
+    def __getstate__(self):
+        # Worker processes map the tensor file again, instead of receiving a copy of it.
+        state = self.__dict__.copy()
+        if self.tensor_file is not None:
+            del state["payoff_table"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.tensor_file is not None:
+            self.payoff_table = np.load(self.tensor_file, mmap_mode="r")
+
+    def get_strategy_descriptions(self):
+        return self.strategy_catalogues
+
+    def get_payoff_denominator(self):
+        return self.denominator
+
+    def get_payoff_block(self, profile_indexes):
+        profile_positions = np.ravel_multi_index(tuple(np.transpose(profile_indexes)),
+                                                 self.get_strategies_per_player(), order="F")
+        return np.asarray(self.payoff_table[profile_positions])
+
+    def get_expected_utility_numerators(self, strategy_profile):
+        strategy_indexes = [[player_specification.get_strategy_index(player_strategy)] for
+                            player_specification, player_strategy in zip(self.player_specifications, strategy_profile)]
+        return list(self.get_payoff_block(np.transpose(strategy_indexes))[0])
+
+    def get_expected_utilities(self, strategy_profile):
+        return self.get_payoffs(self.get_expected_utility_numerators(strategy_profile))
+
+    def get_payoff_tensor(self):
+        return self.payoff_table.reshape(self.get_strategies_per_player() + [self.num_players], order="F")
+
+
+def get_numeric_dtype(payoff_block):
+    """
+    :return: Type for storing payoffs in a binary file. Fractions and unbounded integers can't be stored.
+    """
+    numeric_block = np.array(payoff_block.tolist())
+    if numeric_block.dtype.kind not in "iuf":
+        raise ValueError("Payoffs of type " + str(numeric_block.dtype) + " can't be stored in a binary tensor")
+
+    return numeric_block.dtype
+
+
+def get_pure_equilibria(payoff_tensor):
+    """
+    Finds the pure-strategy equilibria of a payoff tensor: profiles where every player's payoff is a maximum along
+    that player's axis.
+    :param payoff_tensor: Array indexed by strategy indexes, with one payoff per player in the last axis.
+    :return: List of strategy index tuples, in Gambit's profile ordering.
+    """
+    num_players = payoff_tensor.shape[-1]
+    is_equilibrium = np.ones(payoff_tensor.shape[:-1], dtype=bool)
+
+    for player_index in range(num_players):
+        player_payoffs = payoff_tensor[..., player_index]
+        is_equilibrium &= player_payoffs == player_payoffs.max(axis=player_index, keepdims=True)
+
+    # Transposing makes the first player's strategy change fastest, as in Gambit.
+    return [tuple(int(strategy_index) for strategy_index in reversed(reversed_indexes)) for reversed_indexes in
+            np.argwhere(is_equilibrium.T)]
+
+
+worker_context = {}
+
+
+def initialize_payoff_worker(game, strategy_catalogues, payoff_version):
+    worker_context["game"] = game
+    worker_context["strategy_catalogues"] = strategy_catalogues
+    worker_context["payoff_version"] = payoff_version
+
+
+def get_worker_payoff_lines(block_range):
+    block_start, block_stop = block_range
+    return worker_context["game"].get_payoff_lines(block_start, block_stop, worker_context["strategy_catalogues"],
+                                                   worker_context["payoff_version"])
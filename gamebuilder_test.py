@@ -1,7 +1,14 @@
+import itertools
+import os
+import tempfile
 import unittest
+from unittest import mock
+
+import numpy as np
 
 from gamebuilder import PlayerSpecification
 from gamebuilder import BayesianGame
+from gamebuilder import PayoffTensorGame
 
 
 class SampleGame(BayesianGame):
@@ -97,7 +104,67 @@ class BayesianGameTest(unittest.TestCase):
         self.assertAlmostEqual(actual_player_utility, expected_player_utility)
         self.assertAlmostEqual(actual_opponent_utility, expected_opponent_utility)
 
+    def test_interim_values(self):
+        for strategy_profile in itertools.product(*self.sample_game.get_strategy_catalogues()):
+            strategy_counts = [specification.get_strategy_counts(player_strategy) for specification, player_strategy
+                               in zip(self.sample_game.player_specifications, strategy_profile)]
+            expected_utilities = self.sample_game.get_expected_utilities(strategy_profile)
+
+            for player_index, player_specification in enumerate(self.sample_game.player_specifications):
+                interim_values, denominator = self.sample_game.get_interim_values(player_index, strategy_counts)
+                actual_utility = player_specification.get_strategy_value(interim_values,
+                                                                         strategy_profile[player_index]) / denominator
+                self.assertAlmostEqual(actual_utility, expected_utilities[player_index])
+
+    def test_best_response(self):
+        strategy_counts = [self.player_specification.get_strategy_counts(("D", "U")),
+                           self.opponent_specification.get_strategy_counts(("R", "R"))]
+
+        best_strategy, best_utility, current_utility = self.sample_game.get_best_response(0, strategy_counts)
+        self.assertEqual(best_strategy, ("D", "D"))
+        self.assertAlmostEqual(float(best_utility), 1.3)
+        self.assertAlmostEqual(float(current_utility), 0.7)
+
     def test_to_nfg_file(self):
         nfg_file, _ = self.sample_game.to_nfg_file()
         expected_file_name = self.sample_game.game_name + ".nfg"
         self.assertEqual(nfg_file, expected_file_name)
+
+    def test_to_nfg_file_payoff_version(self):
+        nfg_file, _ = self.sample_game.to_nfg_file(payoff_version=True)
+
+        with open(nfg_file) as nfg_content:
+            payoff_lines = nfg_content.read().split("\n\n")[1].splitlines()
+
+        self.assertEqual(len(payoff_lines), 16)
+
+        expected_payoffs = self.sample_game.get_expected_utilities((("U", "U"), ("R", "R")))
+        actual_payoffs = [float(payoff) for payoff in payoff_lines[0].split()]
+        self.assertEqual(actual_payoffs, expected_payoffs)
+
+    def test_save_payoff_tensor(self):
+        with tempfile.TemporaryDirectory() as tensor_directory:
+            file_prefix = os.path.join(tensor_directory, self.sample_game.game_name)
+            self.sample_game.save_payoff_tensor(file_prefix)
+
+            saved_game = PayoffTensorGame.from_file(file_prefix)
+            self.assertNotIsInstance(saved_game, BayesianGame)
+            self.assertIsInstance(saved_game.get_payoff_tensor(), np.memmap)
+            self.assertTrue(np.array_equal(saved_game.get_payoff_tensor(), self.sample_game.get_payoff_tensor()))
+            self.assertEqual(saved_game.get_strategy_descriptions(), self.sample_game.get_strategy_descriptions())
+
+            strategy_profile = (("D", "U"), ("R", "R"))
+            self.assertEqual(saved_game.get_expected_utilities(strategy_profile),
+                             self.sample_game.get_expected_utilities(strategy_profile))
+
+            del saved_game
+
+    def test_save_mixed_payoff_types(self):
+        payoff_blocks = [np.array([[1, 2], [3, 4]], dtype=object), np.array([[0.5, 1], [1, 0]], dtype=object)]
+
+        with tempfile.TemporaryDirectory() as tensor_directory, mock.patch("gamebuilder.PROFILE_BLOCK_SIZE", 2), \
+                mock.patch.object(self.sample_game, "get_profile_payoffs", side_effect=payoff_blocks):
+            file_prefix = os.path.join(tensor_directory, self.sample_game.game_name)
+
+            self.assertRaises(ValueError, self.sample_game.save_payoff_tensor, file_prefix)
+            self.assertFalse(os.path.exists(file_prefix + ".npy"))
@@ -4,6 +4,9 @@ from abc import ABC, abstractmethod
 
 import gambitutils
 
+# Rows of a cartesian product generated at a time.
+CARTESIAN_BLOCK_SIZE = 2 ** 16
+
 
 class Strategy:
 
@@ -33,10 +36,13 @@ class PlayerSpecification(object):
         self.pure_strategies = self.initialize_pure_strategies()
         self.strategy_catalogue = []
         self.strategy_descriptions = []
+        self.strategy_indexes = {}
 
     def initialize_pure_strategies(self):
-        actions_by_type = [np.copy(self.player_actions) for _ in range(len(self.player_types))]
-        return get_cartesian_product(*actions_by_type)
+        action_blocks = [self.player_actions[index_block] for index_block in
+                         get_cartesian_index_blocks([len(self.player_actions)] * len(self.player_types))]
+        return np.concatenate(action_blocks) if action_blocks else np.empty((0, len(self.player_types)),
+                                                                            dtype=self.player_actions.dtype)
 
     def get_pure_strategies(self):
         return self.pure_strategies
@@ -52,15 +58,28 @@ class PlayerSpecification(object):
         return np.ndarray.item(np.where(self.player_types == player_type)[0])
 
     def get_strategy_index(self, player_strategy):
-        return self.strategy_catalogue.index(player_strategy)
+        return self.strategy_indexes[tuple(player_strategy)]
 
     def add_to_strategy_catalogue(self, player_strategy, strategy_description):
 
         strategy_as_tuple = tuple(player_strategy.player_strategy)
-        if strategy_as_tuple not in self.strategy_catalogue:
+        if strategy_as_tuple not in self.strategy_indexes:
+            self.strategy_indexes[strategy_as_tuple] = len(self.strategy_catalogue)
             self.strategy_catalogue.append(strategy_as_tuple)
             self.strategy_descriptions.append(strategy_description)
 
+    def initialize_strategy_catalogue(self):
+        """
+        Registers all pure strategies at once, in enumeration order, with their descriptions.
+        """
+        self.strategy_catalogue = []
+        self.strategy_descriptions = []
+        self.strategy_indexes = {}
+
+        for player_strategy in self.pure_strategies.tolist():
+            player_strategy = Strategy(player_strategy, self)
+            self.add_to_strategy_catalogue(player_strategy, self.get_strategy_description(player_strategy))
+
     def get_strategy_catalogue(self):
         return self.strategy_descriptions
 
@@ -97,43 +116,81 @@ class BayesianGame(ABC):
     def get_utility(self, player_type, player_strategy, opponent_type, opponnet_strategy):
         pass
 
+    def get_payoff_matrices(self, player_strategies, opponent_strategies):
+        """
+        Hook for games with a vectorized utility kernel. By default, payoffs are calculated profile by profile.
+        :param player_strategies: Matrix with a row per player strategy and an action per type.
+        :param opponent_strategies: Matrix with a row per opponent strategy and an action per type.
+        :return: Player and opponent payoff numerators, with a row per player strategy and a column per opponent
+        strategy, and their common denominator. None if the game has no kernel.
+        """
+        return None
+
     def get_strategy_catalogues(self):
         strategies_catalogues = [self.player_specification.get_strategy_catalogue(),
                                  self.opponent_specification.get_strategy_catalogue()]
 
         return strategies_catalogues
 
-    def register_action_profile(self, player_strategy, player_strategy_desc, opponent_strategy, opponent_strategy_desc):
-        self.player_specification.add_to_strategy_catalogue(player_strategy, player_strategy_desc)
-        self.opponent_specification.add_to_strategy_catalogue(opponent_strategy, opponent_strategy_desc)
+    def get_strategic_game_format(self, payoff_version=False):
+        """
+        Writes the NFG file of the game. Payoffs are calculated and streamed to disk a block of profiles at a time,
+        so memory is bounded by the block size plus the pure strategies.
+        :param payoff_version: If True, writes only the payoff vectors instead of one named outcome per profile.
+        :return: Name of the generated file.
+        """
+        player_rows = self.player_specification.get_pure_strategies()
+        opponent_rows = self.opponent_specification.get_pure_strategies()
+
+        # Profiles only look up descriptions, registered once per strategy.
+        self.player_specification.initialize_strategy_catalogue()
+        self.opponent_specification.initialize_strategy_catalogue()
+        strategies_catalogues = self.get_strategy_catalogues()
+        player_descriptions, opponent_descriptions = strategies_catalogues
 
-    def get_strategic_game_format(self):
-        player_strategies = np.apply_along_axis(lambda row: Strategy(row, self.player_specification), 1,
-                                                self.player_specification.get_pure_strategies())
-        opponent_strategies = np.apply_along_axis(lambda row: Strategy(row, self.opponent_specification), 1,
-                                                  self.opponent_specification.get_pure_strategies())
+        file_name = gambitutils.start_nfg_file(self.game_name, strategies_catalogues)
+        with open(file_name, "a") as nfg_file:
+            nfg_writer = gambitutils.NfgWriter(nfg_file, payoff_version=payoff_version)
+            nfg_writer.start()
 
-        pure_strategy_profiles = get_cartesian_product(opponent_strategies, player_strategies)
-        profile_payoffs = []
+            for profile_block in get_cartesian_index_blocks([len(opponent_rows), len(player_rows)],
+                                                            block_size=CARTESIAN_BLOCK_SIZE):
+                opponent_indexes, player_indexes = profile_block.T
+                block_payoffs = self.get_block_payoffs(player_rows, opponent_rows, player_indexes, opponent_indexes)
 
-        for strategy_profile in pure_strategy_profiles:
-            player_strategy = strategy_profile[1]
-            opponent_strategy = strategy_profile[0]
+                payoff_lines = []
+                for opponent_index, player_index, payoffs in zip(opponent_indexes.tolist(), player_indexes.tolist(),
+                                                                 block_payoffs):
+                    profile_name = "P1_" + player_descriptions[player_index] + "_P2_" + opponent_descriptions[
+                        opponent_index]
 
-            payoffs = self.get_expected_utilities((player_strategy, opponent_strategy))
+                    logging.debug("Profile: " + profile_name + " Payoffs: " + str(payoffs))
+                    payoff_lines.append(nfg_writer.get_payoff_line(profile_name, payoffs))
 
-            player_strategy_desc = self.player_specification.get_strategy_description(player_strategy)
-            opponent_strategy_desc = self.opponent_specification.get_strategy_description(opponent_strategy)
-            self.register_action_profile(player_strategy, player_strategy_desc, opponent_strategy,
-                                         opponent_strategy_desc)
+                nfg_writer.write_lines(payoff_lines)
 
-            profile_name = "P1_" + player_strategy_desc + "_P2_" + opponent_strategy_desc
+            nfg_writer.close()
 
-            logging.debug("Profile: " + profile_name + " Payoffs: " + str(payoffs))
-            profile_payoffs.append((profile_name, payoffs))
+        return file_name
 
-        strategies_catalogues = self.get_strategy_catalogues()
-        return gambitutils.get_strategic_game_format(self.game_name, strategies_catalogues, profile_payoffs)
+    def get_block_payoffs(self, player_rows, opponent_rows, player_indexes, opponent_indexes):
+        """
+        Calculates the payoffs of a block of profiles. The payoff matrices are only obtained for the strategies in the
+        block, which span at most three times as many pairs as the block has profiles.
+        :return: Player and opponent payoffs per profile.
+        """
+        block_players, player_positions = np.unique(player_indexes, return_inverse=True)
+        block_opponents, opponent_positions = np.unique(opponent_indexes, return_inverse=True)
+
+        payoff_matrices = self.get_payoff_matrices(player_rows[block_players], opponent_rows[block_opponents])
+        if payoff_matrices is None:
+            return [self.get_expected_utilities((Strategy(player_rows[player_index], self.player_specification),
+                                                 Strategy(opponent_rows[opponent_index], self.opponent_specification)))
+                    for player_index, opponent_index in zip(player_indexes.tolist(), opponent_indexes.tolist())]
+
+        player_numerators, opponent_numerators, denominator = payoff_matrices
+        return zip(get_fraction_strings(player_numerators[player_positions, opponent_positions], denominator),
+                   get_fraction_strings(opponent_numerators[player_positions, opponent_positions], denominator))
 
     def calculate_equilibria(self):
         logging.info("Starting equilibrium calculation ...")
@@ -146,8 +203,51 @@ class BayesianGame(ABC):
                                                  strategy_catalogues=strategies_catalogues)
 
 
+def get_fraction_strings(numerators, denominator):
+    """
+    :return: Payoffs over the denominator, written as reduced fractions like str(Fraction).
+    """
+    common_divisors = np.gcd(numerators, denominator)
+    return [str(numerator) if reduced_denominator == 1 else str(numerator) + "/" + str(reduced_denominator)
+            for numerator, reduced_denominator in zip((numerators // common_divisors).tolist(),
+                                                      (denominator // common_divisors).tolist())]
+
+
+def get_cartesian_axis_order(num_lists):
+    """
+    :return: Lists of a cartesian product in the order of np.meshgrid, from the slowest to the fastest: the last,
+    ..., the third, the first and the second.
+    """
+    return list(range(num_lists - 1, 1, -1)) + list(range(min(num_lists, 2)))
+
+
+def get_cartesian_index_blocks(list_sizes, block_size=CARTESIAN_BLOCK_SIZE):
+    """
+    Yields the rows of the cartesian product of lists with the given sizes, as integer index blocks of at most
+    block_size rows, in the order of get_cartesian_axis_order.
+    """
+    num_lists = len(list_sizes)
+    axis_order = get_cartesian_axis_order(num_lists)
+    ordered_sizes = [list_sizes[axis] for axis in axis_order]
+
+    num_rows = int(np.prod(ordered_sizes, dtype=object)) if num_lists > 0 else 0
+    for block_start in range(0, num_rows, block_size):
+        row_positions = np.arange(block_start, min(block_start + block_size, num_rows), dtype=np.int64)
+
+        index_block = np.empty((len(row_positions), num_lists), dtype=np.int64)
+        index_block[:, axis_order] = np.stack(np.unravel_index(row_positions, ordered_sizes), axis=1)
+        yield index_block
+
+
 def get_cartesian_product(*list_of_lists, row_size=None):
     if row_size is None:
         row_size = len(list_of_lists)
 
-    return np.array(np.meshgrid(*list_of_lists), dtype=object).T.reshape(-1, row_size)
+    list_arrays = [np.asarray(list_values) for list_values in list_of_lists]
+    product_blocks = [np.column_stack([list_array[index_block[:, list_index]] for list_index, list_array in
+                                       enumerate(list_arrays)]) for index_block in
+                      get_cartesian_index_blocks([len(list_array) for list_array in list_arrays])]
+    if not product_blocks:
+        return np.empty((0, row_size), dtype=np.result_type(*list_arrays))
+
+    return np.concatenate(product_blocks).reshape(-1, row_size)
@@ -2,7 +2,7 @@ import unittest
 import numpy as np
 
 from gamebuildernp import PlayerSpecification, Strategy
-from gamebuildernp import BayesianGame
+from gamebuildernp import BayesianGame, get_cartesian_index_blocks
 
 
 class SampleGame(BayesianGame):
@@ -83,3 +83,19 @@ class BayesianGameTest(unittest.TestCase):
 
     def test_get_game_file(self):
         self.sample_game.get_strategic_game_format()
+
+    def test_strategy_catalogue(self):
+        self.sample_game.get_strategic_game_format()
+
+        player_specification = self.sample_game.player_specification
+        self.assertEqual(player_specification.get_strategy_catalogue(),
+                         ["Type_1_action_U_Type_2_action_U", "Type_1_action_U_Type_2_action_D",
+                          "Type_1_action_D_Type_2_action_U", "Type_1_action_D_Type_2_action_D"])
+        self.assertEqual(player_specification.get_strategy_index(("D", "U")), 2)
+
+    def test_cartesian_index_blocks(self):
+        index_blocks = list(get_cartesian_index_blocks([2, 2, 3], block_size=5))
+        self.assertEqual([len(index_block) for index_block in index_blocks], [5, 5, 2])
+
+        expected_rows = np.array(np.meshgrid(range(2), range(2), range(3))).T.reshape(-1, 3)
+        self.assertTrue(np.array_equal(np.concatenate(index_blocks), expected_rows))
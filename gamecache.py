@@ -0,0 +1,148 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+import numpy as np
+
+import gamebuilder
+
+DEFAULT_CACHE_DIRECTORY = ".game_cache"
+DEFAULT_MAX_SIZE = 2 ** 30
+
+PAYOFF_TENSOR_FILE = "payoff_tensor.npy"
+PAYOFF_METADATA_FILE = "payoff_tensor.json"
+
+
+def get_equilibria_file(only_pure):
+    return ("pure" if only_pure else "all") + "_equilibria.json"
+
+
+def write_json(file_name, content):
+    temporary_file = file_name + ".tmp"
+    try:
+        with open(temporary_file, "w") as json_file:
+            json.dump(content, json_file)
+    except Exception:
+        os.remove(temporary_file)
+        raise
+
+    os.replace(temporary_file, file_name)
+
+
+def read_json(file_name):
+    with open(file_name) as json_file:
+        return json.load(json_file)
+
+
+class GameCache(object):
+    """
+    On-disk cache of payoff tensors and equilibria, keyed by a hash of the game definition: specification classes,
+    types, actions, bid ranges, game flags and number of players. When the cache grows beyond max_size bytes, the
+    least recently used games are evicted.
+    """
+
+    def __init__(self, cache_directory=DEFAULT_CACHE_DIRECTORY, max_size=DEFAULT_MAX_SIZE):
+        self.cache_directory = cache_directory
+        self.max_size = max_size
+
+        os.makedirs(cache_directory, exist_ok=True)
+
+    @staticmethod
+    def get_game_key(game):
+        game_definition = json.dumps(game.get_game_definition(), sort_keys=True, default=str)
+        return hashlib.sha256(game_definition.encode()).hexdigest()
+
+    def get_entry_directory(self, game):
+        return os.path.join(self.cache_directory, self.get_game_key(game))
+
+    def get_cached_file(self, game, file_name):
+        """
+        :return: Path of a file in the game's entry, or None if it's not cached. Found entries are marked as used.
+        """
+        entry_directory = self.get_entry_directory(game)
+        cached_file = os.path.join(entry_directory, file_name)
+        if not os.path.exists(cached_file):
+            return None
+
+        os.utime(entry_directory)
+        return cached_file
+
+    def has_equilibria(self, game, only_pure=True):
+        return os.path.exists(os.path.join(self.get_entry_directory(game), get_equilibria_file(only_pure)))
+
+    def get_payoff_tensor(self, game):
+        """
+        Payoffs are cached as a numeric .npy file, loaded without pickle. Tensors that only fit Python integers are
+        not cached.
+        :return: Payoff tensor of the game, and the denominator of its entries.
+        """
+        tensor_file = self.get_cached_file(game, PAYOFF_TENSOR_FILE)
+        if tensor_file is not None:
+            logging.info("Payoff tensor of " + game.game_name + " found in cache")
+            payoff_metadata = read_json(os.path.join(os.path.dirname(tensor_file), PAYOFF_METADATA_FILE))
+            return np.load(tensor_file), payoff_metadata["denominator"]
+
+        payoff_tensor = game.get_payoff_tensor()
+        denominator = game.get_payoff_denominator()
+        try:
+            payoff_tensor = payoff_tensor.astype(gamebuilder.get_numeric_dtype(payoff_tensor))
+        except ValueError as type_error:
+            logging.warning("Payoff tensor of " + game.game_name + " not cached: " + str(type_error))
+            return payoff_tensor, denominator
+
+        entry_directory = self.get_entry_directory(game)
+        os.makedirs(entry_directory, exist_ok=True)
+        write_json(os.path.join(entry_directory, PAYOFF_METADATA_FILE), {"denominator": denominator})
+        np.save(os.path.join(entry_directory, PAYOFF_TENSOR_FILE), payoff_tensor)
+
+        self.evict(entry_directory)
+        return payoff_tensor, denominator
+
+    def get_equilibria(self, game, only_pure=True, **solver_options):
+        """
+        :param solver_options: Passed to calculate_equilibria on a cache miss.
+        :return: Equilibria as returned by calculate_equilibria. None if the solver failed, which is never cached.
+        """
+        equilibria_file = self.get_cached_file(game, get_equilibria_file(only_pure))
+        if equilibria_file is not None:
+            logging.info("Equilibria of " + game.game_name + " found in cache")
+            return [{(player_index, strategy_index): probability for player_index, strategy_index, probability in
+                     equilibrium} for equilibrium in read_json(equilibria_file)]
+
+        equilibria = game.calculate_equilibria(only_pure=only_pure, **solver_options)
+        if equilibria is None:
+            return None
+
+        entry_directory = self.get_entry_directory(game)
+        os.makedirs(entry_directory, exist_ok=True)
+        write_json(os.path.join(entry_directory, get_equilibria_file(only_pure)),
+                   [[[player_index, strategy_index, probability] for (player_index, strategy_index), probability in
+                     equilibrium.items()] for equilibrium in equilibria])
+
+        self.evict(entry_directory)
+        return equilibria
+
+    def get_entry_size(self, entry_directory):
+        return sum(os.path.getsize(os.path.join(entry_directory, file_name)) for file_name in
+                   os.listdir(entry_directory))
+
+    def evict(self, kept_directory=None):
+        """
+        Removes the least recently used entries until the cache fits in max_size. The kept entry is never removed.
+        """
+        entries = []
+        for entry_name in os.listdir(self.cache_directory):
+            entry_directory = os.path.join(self.cache_directory, entry_name)
+            entries.append((os.path.getmtime(entry_directory), entry_directory, self.get_entry_size(entry_directory)))
+
+        cache_size = sum(entry_size for _, _, entry_size in entries)
+        for _, entry_directory, entry_size in sorted(entries):
+            if cache_size <= self.max_size:
+                break
+
+            if entry_directory != kept_directory:
+                logging.info("Evicting " + entry_directory + " from the game cache")
+                shutil.rmtree(entry_directory)
+                cache_size -= entry_size
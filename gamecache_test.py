@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from auctions import FirstPriceAuction, AuctionPlayerSpecification
+from customspec import CustomWeaklyIncreasing
+import gamecache
+from gamecache import GameCache
+
+
+def get_sample_auction(game_name="cached_auction", no_ties=False, player_valuations=range(0, 3)):
+    player_specifications = [AuctionPlayerSpecification(player_types=player_valuations,
+                                                        player_actions=player_valuations,
+                                                        no_jumps=False) for _ in range(2)]
+
+    return FirstPriceAuction(game_name=game_name, player_specifications=player_specifications, all_pay=False,
+                             no_ties=no_ties)
+
+
+class GameCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.TemporaryDirectory()
+        self.game_cache = GameCache(cache_directory=self.cache_directory.name)
+
+    def tearDown(self):
+        self.cache_directory.cleanup()
+
+    def test_game_key(self):
+        game_key = self.game_cache.get_game_key(get_sample_auction())
+
+        self.assertEqual(self.game_cache.get_game_key(get_sample_auction(game_name="renamed_auction")), game_key)
+        self.assertNotEqual(self.game_cache.get_game_key(get_sample_auction(no_ties=True)), game_key)
+
+        custom_specifications = [CustomWeaklyIncreasing(range_list=[(0, 0), (0, 0), (0, 1)], no_jumps=False)
+                                 for _ in range(2)]
+        custom_auction = FirstPriceAuction(game_name="cached_auction", player_specifications=custom_specifications)
+        self.assertNotEqual(self.game_cache.get_game_key(custom_auction), game_key)
+
+    def test_payoff_tensor(self):
+        sample_auction = get_sample_auction()
+        expected_tensor, expected_denominator = self.game_cache.get_payoff_tensor(sample_auction)
+
+        another_auction = get_sample_auction()
+        with mock.patch.object(another_auction, "get_payoff_tensor", side_effect=AssertionError()):
+            actual_tensor, actual_denominator = self.game_cache.get_payoff_tensor(another_auction)
+
+        self.assertTrue(np.array_equal(actual_tensor, expected_tensor))
+        self.assertEqual(actual_denominator, expected_denominator)
+
+    def test_unbounded_payoff_tensor(self):
+        sample_auction = get_sample_auction()
+        unbounded_tensor = np.array([[2 ** 70, 1]], dtype=object)
+
+        with mock.patch.object(sample_auction, "get_payoff_tensor", return_value=unbounded_tensor):
+            actual_tensor, _ = self.game_cache.get_payoff_tensor(sample_auction)
+
+        self.assertIs(actual_tensor, unbounded_tensor)
+        self.assertFalse(os.path.exists(self.game_cache.get_entry_directory(sample_auction)))
+
+    def test_equilibria(self):
+        sample_auction = get_sample_auction()
+        self.assertFalse(self.game_cache.has_equilibria(sample_auction))
+
+        expected_equilibria = self.game_cache.get_equilibria(sample_auction, only_pure=True, in_process=True)
+        self.assertTrue(self.game_cache.has_equilibria(sample_auction))
+
+        another_auction = get_sample_auction()
+        with mock.patch.object(another_auction, "calculate_equilibria", side_effect=AssertionError()):
+            actual_equilibria = self.game_cache.get_equilibria(another_auction, only_pure=True)
+
+        self.assertEqual(actual_equilibria, expected_equilibria)
+
+    def test_solver_failure(self):
+        sample_auction = get_sample_auction()
+
+        with tempfile.TemporaryDirectory() as nfg_directory, mock.patch("gambitutils.calculate_equilibrium",
+                                                                        return_value=None):
+            sample_auction.nfg_directory = nfg_directory
+            self.assertIsNone(self.game_cache.get_equilibria(sample_auction, only_pure=True))
+
+        self.assertFalse(self.game_cache.has_equilibria(sample_auction))
+        self.assertFalse(os.path.exists(self.game_cache.get_entry_directory(sample_auction)))
+
+    def test_failed_json_write(self):
+        with tempfile.TemporaryDirectory() as json_directory:
+            json_file = os.path.join(json_directory, "content.json")
+
+            self.assertRaises(TypeError, gamecache.write_json, json_file, {"content": object()})
+            self.assertEqual(os.listdir(json_directory), [])
+
+    def test_eviction(self):
+        first_auction = get_sample_auction()
+        self.game_cache.get_payoff_tensor(first_auction)
+        first_directory = self.game_cache.get_entry_directory(first_auction)
+        os.utime(first_directory, (0, 0))
+
+        self.game_cache.max_size = self.game_cache.get_entry_size(first_directory)
+
+        second_auction = get_sample_auction(no_ties=True)
+        self.game_cache.get_payoff_tensor(second_auction)
+
+        self.assertFalse(os.path.exists(first_directory))
+        self.assertTrue(os.path.exists(self.game_cache.get_entry_directory(second_auction)))
@@ -16,25 +16,32 @@ class AuctionPlayerSpecification(PlayerSpecification):
                                                          player_actions=player_valuations)
 
     def initialize_pure_strategies(self):
-        pure_strategies = []
+        """
+        Builds the non-decreasing strategies directly, extending valid prefixes type by type. They are sorted as in
+        the cartesian product of the bids per type.
+        """
+        bids_by_type = [self.player_actions[self.player_actions <= valuation] for valuation in self.player_types]
 
-        for valuation in self.player_types:
-            pure_strategies.append([bid for bid in self.player_actions if bid <= valuation])
+        strategy_indexes = np.zeros((1, 0), dtype=np.int64)
+        last_bids = None
+        for type_index, type_bids in enumerate(bids_by_type):
+            index_blocks = [np.zeros((0, type_index + 1), dtype=np.int64)]
+            bid_blocks = [np.zeros(0, dtype=type_bids.dtype)]
+            for bid_index, bid in enumerate(type_bids):
+                valid_prefixes = strategy_indexes if last_bids is None else strategy_indexes[last_bids <= bid]
 
-        product = gamebuildernp.get_cartesian_product(*pure_strategies)
-        valid_filter = np.array([self.is_valid_strategy(row) for row in product])
-        return product[valid_filter]
+                index_blocks.append(np.column_stack([valid_prefixes, np.full(len(valid_prefixes), bid_index)]))
+                bid_blocks.append(np.full(len(valid_prefixes), bid))
 
-    @staticmethod
-    def is_valid_strategy(strategy):
-        for index, current_bid in enumerate(strategy):
-            if index > 0:
-                previous_bid = strategy[index - 1]
+            strategy_indexes = np.concatenate(index_blocks)
+            last_bids = np.concatenate(bid_blocks)
 
-                if previous_bid > current_bid:
-                    return False
+        axis_order = gamebuildernp.get_cartesian_axis_order(len(bids_by_type))
+        strategy_order = np.lexsort([strategy_indexes[:, axis] for axis in reversed(axis_order)])
+        strategy_indexes = strategy_indexes[strategy_order]
 
-        return True
+        return np.column_stack([type_bids[strategy_indexes[:, type_index]] for type_index, type_bids in
+                                enumerate(bids_by_type)]).reshape(-1, len(bids_by_type))
 
 
 class FirstPriceAuction(BayesianGame):
@@ -59,6 +66,62 @@ class FirstPriceAuction(BayesianGame):
         else:
             return Fraction(player_type - player_bid, 2), Fraction(opponent_type - opponent_bid, 2)
 
+    def get_payoff_matrices(self, player_strategies, opponent_strategies):
+        """
+        Calculates the whole bimatrix with two matrix products. For each strategy, types are grouped by bid: the
+        surplus of a bid is weighted by the number of opponent types bidding below it, plus half the ones bidding the
+        same.
+        :return: Player and opponent payoff numerators, with a row per player strategy and a column per opponent
+        strategy, over a denominator of 2 * player types * opponent types.
+        """
+        bids = np.union1d(self.player_specification.player_actions, self.opponent_specification.player_actions)
+
+        player_bid_indexes = np.searchsorted(bids, np.asarray(player_strategies, dtype=np.int64))
+        opponent_bid_indexes = np.searchsorted(bids, np.asarray(opponent_strategies, dtype=np.int64))
+
+        player_surplus = get_surplus_by_bid(self.player_specification.player_types, player_bid_indexes, bids)
+        opponent_surplus = get_surplus_by_bid(self.opponent_specification.player_types, opponent_bid_indexes, bids)
+
+        player_win_weights = get_win_weights(player_bid_indexes, len(bids))
+        opponent_win_weights = get_win_weights(opponent_bid_indexes, len(bids))
+
+        player_numerators = player_surplus @ opponent_win_weights.T
+        opponent_numerators = player_win_weights @ opponent_surplus.T
+
+        denominator = 2 * len(self.player_specification.player_types) * len(self.opponent_specification.player_types)
+        return player_numerators, opponent_numerators, denominator
+
+
+def get_bids_per_strategy(bid_indexes, num_bids, type_weights):
+    """
+    :return: Matrix with a row per strategy, and the sum of type weights per bid.
+    """
+    num_strategies, num_types = bid_indexes.shape
+    bid_weights = np.zeros((num_strategies, num_bids), dtype=np.int64)
+    np.add.at(bid_weights, (np.repeat(np.arange(num_strategies), num_types), bid_indexes.ravel()),
+              np.broadcast_to(type_weights, bid_indexes.shape).ravel())
+
+    return bid_weights
+
+
+def get_surplus_by_bid(valuations, bid_indexes, bids):
+    """
+    :return: Matrix with a row per strategy, and the surplus of the types placing each bid.
+    """
+    surplus = np.asarray(valuations, dtype=np.int64) - bids[bid_indexes]
+    return get_bids_per_strategy(bid_indexes, len(bids), surplus)
+
+
+def get_win_weights(bid_indexes, num_bids):
+    """
+    :return: Matrix with a row per strategy, and for each bid twice the number of types bidding less plus the
+    number of types bidding the same.
+    """
+    types_per_bid = get_bids_per_strategy(bid_indexes, num_bids, 1)
+    types_below = np.cumsum(types_per_bid, axis=1) - types_per_bid
+
+    return 2 * types_below + types_per_bid
+
 
 if __name__ == "__main__":
     # player_valuations = range(50, 53)
@@ -73,6 +136,7 @@ if __name__ == "__main__":
     # player_valuations = range(50, 62)
     # opponent_valuations = range(50, 58)
 
+    # Payoff matrices can be obtained for blocks of strategies, but there are too many strategies to enumerate.
     # player_valuations = range(50, 200 + 1)
     # opponent_valuations = range(50, 150 + 1)
 
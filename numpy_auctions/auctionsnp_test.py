@@ -1,8 +1,11 @@
+import os
 import unittest
 from fractions import Fraction
+from unittest import mock
 
 import numpy as np
 
+import gambitutils
 from numpy_auctions.auctionsnp import FirstPriceAuction
 from gamebuildernp import Strategy
 
@@ -50,6 +53,40 @@ class FirstPriceAuctionTest(unittest.TestCase):
         self.assertAlmostEqual(actual_strong_utility, expected_strong_utility)
         self.assertAlmostEqual(actual_weak_utility, expected_weak_utility)
 
+    def test_payoff_matrices(self):
+        player_strategies = self.sample_auction.player_specification.get_pure_strategies()
+        opponent_strategies = self.sample_auction.opponent_specification.get_pure_strategies()
+
+        player_numerators, opponent_numerators, denominator = self.sample_auction.get_payoff_matrices(
+            player_strategies, opponent_strategies)
+        self.assertEqual(player_numerators.shape, (len(player_strategies), len(opponent_strategies)))
+
+        for player_index, player_strategy in enumerate(player_strategies):
+            for opponent_index, opponent_strategy in enumerate(opponent_strategies):
+                expected_utilities = self.sample_auction.get_expected_utilities(
+                    (Strategy(player_strategy, self.sample_auction.player_specification),
+                     Strategy(opponent_strategy, self.sample_auction.opponent_specification)))
+
+                self.assertEqual(expected_utilities,
+                                 (Fraction(int(player_numerators[player_index, opponent_index]), denominator),
+                                  Fraction(int(opponent_numerators[player_index, opponent_index]), denominator)))
+
+    def test_strategic_game_format(self):
+        player_numerators, opponent_numerators, denominator = self.sample_auction.get_payoff_matrices(
+            self.sample_auction.player_specification.get_pure_strategies(),
+            self.sample_auction.opponent_specification.get_pure_strategies())
+
+        for payoff_version, block_size in [(False, 4), (True, 3)]:
+            with mock.patch("gamebuildernp.CARTESIAN_BLOCK_SIZE", block_size):
+                nfg_file = self.sample_auction.get_strategic_game_format(payoff_version=payoff_version)
+            _, strategy_catalogues, payoff_table, nfg_denominator = gambitutils.read_nfg_file(nfg_file)
+            os.remove(nfg_file)
+
+            self.assertEqual(strategy_catalogues, self.sample_auction.get_strategy_catalogues())
+            expected_table = np.stack([player_numerators.ravel(order="F"), opponent_numerators.ravel(order="F")],
+                                      axis=1)
+            self.assertTrue(np.array_equal(payoff_table * denominator, expected_table * nfg_denominator))
+
     def test_calculate_equilibria(self):
         actual_equilibria = self.sample_auction.calculate_equilibria()
         self.assertEqual(len(actual_equilibria), 2)
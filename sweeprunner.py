@@ -0,0 +1,221 @@
+import csv
+import hashlib
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from auctions import FirstPriceAuction, AuctionPlayerSpecification
+from customspec import CustomWeaklyIncreasing
+
+# Rough memory footprint of a payoff, while Gambit or the in-process solver hold the whole game.
+BYTES_PER_PAYOFF = 64
+
+SUMMARY_COLUMNS = ["Game", "Num_players", "Valuations", "All_pay", "No_ties", "No_jumps", "Only_pure", "Profiles",
+                   "Status", "Equilibria", "Seconds", "Results_file"]
+
+
+def get_game_name(num_players, all_pay, no_ties, no_jumps, valuations):
+    return "num_players_" + str(num_players) + "_allpay_" + str(all_pay) + "_noties_" + str(
+        no_ties) + "_nojumps_" + str(no_jumps) + "_" + str(valuations) + "_valuations_auction"
+
+
+def get_valuations(configuration):
+    """
+    :return: The range_list of a configuration, or its player_valuations, as plain lists of values.
+    """
+    range_list = configuration.get("range_list")
+    if range_list is not None:
+        return [list(valuation_range) for valuation_range in range_list]
+
+    return list(configuration["player_valuations"])
+
+
+def get_configuration_name(configuration):
+    """
+    :return: Game name of a sweep configuration. Since get_game_name only has the number of valuations, it ends with
+    a short hash of the configuration, so configurations with different valuations, ranges or solvers don't collide.
+    """
+    num_players = configuration.get("num_players", 2)
+    all_pay = configuration.get("all_pay", False)
+    no_ties = configuration.get("no_ties", False)
+    no_jumps = configuration.get("no_jumps", False)
+    valuations = get_valuations(configuration)
+
+    game_values = {"num_players": num_players, "all_pay": all_pay, "no_ties": no_ties, "no_jumps": no_jumps,
+                   "only_pure": configuration.get("only_pure", True),
+                   "range_list" if "range_list" in configuration else "player_valuations": valuations}
+    game_hash = hashlib.sha256(json.dumps(game_values, sort_keys=True).encode("utf-8")).hexdigest()
+
+    return get_game_name(num_players, all_pay, no_ties, no_jumps, len(valuations)) + "_" + game_hash[:8]
+
+
+def get_sweep_configurations(grid):
+    """
+    :param grid: Dictionary from configuration key to the list of values to sweep. Keys are num_players,
+    player_valuations or range_list, all_pay, no_ties, no_jumps and only_pure.
+    :return: One configuration dictionary per combination of values.
+    """
+    keys = list(grid.keys())
+    return [dict(zip(keys, values)) for values in itertools.product(*[grid[key] for key in keys])]
+
+
+def get_first_price_auction(configuration):
+    """
+    :return: The first-price auction of a sweep configuration. If range_list is present, bids per valuation are
+    restricted with CustomWeaklyIncreasing.
+    """
+    num_players = configuration.get("num_players", 2)
+    all_pay = configuration.get("all_pay", False)
+    no_ties = configuration.get("no_ties", False)
+    no_jumps = configuration.get("no_jumps", False)
+
+    range_list = configuration.get("range_list")
+    if range_list is not None:
+        player_specifications = [CustomWeaklyIncreasing(range_list=range_list, no_jumps=no_jumps) for _ in
+                                 range(num_players)]
+    else:
+        player_valuations = configuration["player_valuations"]
+        player_specifications = [
+            AuctionPlayerSpecification(player_actions=player_valuations, player_types=player_valuations,
+                                       no_jumps=no_jumps) for _ in range(num_players)]
+
+    return FirstPriceAuction(game_name=get_configuration_name(configuration),
+                             player_specifications=player_specifications, all_pay=all_pay, no_ties=no_ties)
+
+
+def get_memory_estimate(auction):
+    """
+    :return: Bytes needed for solving the auction, from its number of payoffs.
+    """
+    return auction.get_number_of_entries() * auction.num_players * BYTES_PER_PAYOFF
+
+
+def get_equilibrium_rows(auction, equilibria, only_pure):
+    """
+    :return: Rows in the format of equilibrium_plots: equilibrium number, player and the bid for each valuation.
+    Mixed equilibria have a row per strategy in the support, with its probability.
+    """
+    rows = []
+    for equilibrium_index, equilibrium in enumerate(equilibria):
+        for (player_index, strategy_index), probability in sorted(equilibrium.items()):
+            if probability.strip("0.") == "":
+                continue
+
+            player_strategy = auction.player_specifications[player_index].get_strategy_catalogue()[strategy_index]
+            row = [equilibrium_index + 1, "Bidder_" + str(player_index + 1)] + list(player_strategy)
+            if not only_pure:
+                row.append(probability)
+            rows.append(row)
+
+    return rows
+
+
+def solve_configuration(configuration, results_directory, solver_options, game_cache):
+    """
+    Obtains the equilibria of a sweep configuration, and writes them to a CSV file in the results directory, where
+    the NFG file also goes.
+    :return: Equilibria found and the name of the CSV file.
+    """
+    auction = get_first_price_auction(configuration)
+    auction.nfg_directory = results_directory
+    only_pure = configuration.get("only_pure", True)
+
+    logging.info("Running: " + auction.game_name)
+    if game_cache is not None:
+        equilibria = game_cache.get_equilibria(auction, only_pure, **solver_options)
+    else:
+        equilibria = auction.calculate_equilibria(only_pure=only_pure, **solver_options)
+
+    if equilibria is None:
+        raise RuntimeError("Gambit failed for game " + auction.game_name)
+
+    num_valuations = len(auction.player_specifications[0].player_types)
+    header = ["Equilibria", "Player"] + ["Bid_for_v_" + str(valuation) for valuation in range(num_valuations)]
+    if not only_pure:
+        header.append("Probability")
+
+    results_file = os.path.join(results_directory, auction.game_name + ".csv")
+    with open(results_file, "w", newline="") as results_content:
+        results_writer = csv.writer(results_content)
+        results_writer.writerow(header)
+        results_writer.writerows(get_equilibrium_rows(auction, equilibria, only_pure))
+
+    return len(equilibria), results_file
+
+
+def run_sweep(configurations, results_directory, workers=None, memory_limit=None, solver_options=None,
+              game_cache=None):
+    """
+    Solves the configurations of a sweep in a process pool, starting by the largest games. A configuration only
+    starts if the memory estimate of the running ones stays under the limit, unless nothing else is running.
+    Equilibria go to a CSV file per game, and each finished configuration is appended to sweep_results.csv.
+    :param workers: Number of processes. By default, the number of CPUs.
+    :param memory_limit: Bytes available for the configurations running at the same time. By default, no limit.
+    :param solver_options: Passed to calculate_equilibria, like in_process=True.
+    :return: Summary rows, in the order the configurations finished.
+    """
+    solver_options = {} if solver_options is None else solver_options
+    os.makedirs(results_directory, exist_ok=True)
+
+    pending_jobs = []
+    for configuration in configurations:
+        auction = get_first_price_auction(configuration)
+        pending_jobs.append((auction.get_number_of_entries(), get_memory_estimate(auction), auction.game_name,
+                             configuration))
+    pending_jobs.sort(key=lambda pending_job: pending_job[0], reverse=True)
+
+    summary_file = os.path.join(results_directory, "sweep_results.csv")
+    summary_rows = []
+    running_jobs = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor, open(summary_file, "w", newline="") as summary_content:
+        summary_writer = csv.DictWriter(summary_content, fieldnames=SUMMARY_COLUMNS)
+        summary_writer.writeheader()
+
+        max_workers = workers if workers is not None else os.cpu_count()
+        while pending_jobs or running_jobs:
+            memory_in_use = sum(running_job[1] for running_job in running_jobs.values())
+            for pending_job in list(pending_jobs):
+                if len(running_jobs) >= max_workers:
+                    break
+
+                fits_memory = memory_limit is None or memory_in_use + pending_job[1] <= memory_limit
+                if fits_memory or len(running_jobs) == 0:
+                    logging.info("Scheduling " + pending_job[2] + " with " + str(pending_job[0]) + " profiles")
+                    future = executor.submit(solve_configuration, pending_job[3], results_directory, solver_options,
+                                             game_cache)
+                    running_jobs[future] = pending_job + (time.time(),)
+                    memory_in_use += pending_job[1]
+                    pending_jobs.remove(pending_job)
+
+            finished_futures, _ = wait(list(running_jobs.keys()), return_when=FIRST_COMPLETED)
+            for future in finished_futures:
+                profiles, _, game_name, configuration, start_time = running_jobs.pop(future)
+                summary_row = get_summary_row(configuration, game_name, profiles)
+                summary_row["Seconds"] = "%.1f" % (time.time() - start_time)
+
+                try:
+                    summary_row["Equilibria"], summary_row["Results_file"] = future.result()
+                    summary_row["Status"] = "done"
+                except Exception as job_error:
+                    logging.error("ERROR WHILE SOLVING GAME " + game_name + " . Error: " + str(job_error))
+                    summary_row["Status"] = "failed: " + str(job_error)
+
+                summary_writer.writerow(summary_row)
+                summary_content.flush()
+                summary_rows.append(summary_row)
+
+    return summary_rows
+
+
+def get_summary_row(configuration, game_name, profiles):
+    return {"Game": game_name,
+            "Num_players": configuration.get("num_players", 2),
+            "Valuations": json.dumps(get_valuations(configuration)),
+            "All_pay": configuration.get("all_pay", False),
+            "No_ties": configuration.get("no_ties", False),
+            "No_jumps": configuration.get("no_jumps", False),
+            "Only_pure": configuration.get("only_pure", True),
+            "Profiles": profiles}
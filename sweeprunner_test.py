@@ -0,0 +1,66 @@
+import csv
+import os
+import tempfile
+import unittest
+
+import sweeprunner
+
+
+class SweepRunnerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sweep_grid = {"num_players": [2, 3],
+                           "player_valuations": [range(0, 3)],
+                           "no_ties": [False],
+                           "only_pure": [True]}
+
+    def test_sweep_configurations(self):
+        configurations = sweeprunner.get_sweep_configurations(self.sweep_grid)
+
+        self.assertEqual(len(configurations), 2)
+        self.assertEqual(configurations[1], {"num_players": 3, "player_valuations": range(0, 3), "no_ties": False,
+                                             "only_pure": True})
+
+    def test_run_sweep(self):
+        configurations = sweeprunner.get_sweep_configurations(self.sweep_grid)
+        configurations.append({"range_list": [(0, 0), (0, 0), (1, 1)], "num_players": 2})
+
+        with tempfile.TemporaryDirectory() as results_directory:
+            summary_rows = sweeprunner.run_sweep(configurations, results_directory, workers=2, memory_limit=1,
+                                                 solver_options={"in_process": True})
+
+            self.assertEqual([summary_row["Status"] for summary_row in summary_rows], ["done"] * 3)
+            with open(os.path.join(results_directory, "sweep_results.csv")) as summary_content:
+                self.assertEqual(len(list(csv.DictReader(summary_content))), 3)
+
+            three_bidders_file = os.path.join(results_directory,
+                                              sweeprunner.get_configuration_name(configurations[1]) + ".csv")
+            with open(three_bidders_file) as results_content:
+                results_rows = list(csv.reader(results_content))
+
+            self.assertEqual(results_rows, [["Equilibria", "Player", "Bid_for_v_0", "Bid_for_v_1", "Bid_for_v_2"],
+                                            ["1", "Bidder_1", "0", "0", "1"],
+                                            ["1", "Bidder_2", "0", "0", "1"],
+                                            ["1", "Bidder_3", "0", "0", "1"]])
+
+    def test_distinct_game_names(self):
+        configurations = [{"player_valuations": range(0, 3)},
+                          {"player_valuations": range(5, 8)},
+                          {"range_list": [(0, 0), (0, 0), (1, 1)]}]
+
+        # The in-process solver only finds pure equilibria, so the mixed configuration is only named.
+        mixed_configuration = {"player_valuations": range(0, 3), "only_pure": False}
+        self.assertEqual(len(set(sweeprunner.get_configuration_name(configuration) for configuration in
+                                 configurations + [mixed_configuration])), 4)
+
+        with tempfile.TemporaryDirectory() as results_directory:
+            summary_rows = sweeprunner.run_sweep(configurations, results_directory, workers=2,
+                                                 solver_options={"in_process": True})
+
+            results_files = set(summary_row["Results_file"] for summary_row in summary_rows)
+            self.assertEqual(len(results_files), 3)
+            self.assertTrue(all(os.path.dirname(results_file) == results_directory for results_file in results_files))
+
+            with open(os.path.join(results_directory, "sweep_results.csv")) as summary_content:
+                valuations = sorted(summary_row["Valuations"] for summary_row in csv.DictReader(summary_content))
+            self.assertEqual(valuations, ["[0, 1, 2]", "[5, 6, 7]", "[[0, 0], [0, 0], [1, 1]]"])